@@ -51,6 +51,8 @@ set SOURCE_FOLDER=%~dp0Source
 set PYTHON_SCRIPT=%SOURCE_FOLDER%\ADF_CLI.py
 set SCRIPT_DL_URL=https://raw.githubusercontent.com/maiz-an/AutoDriveFetch/main/Source/ADF_CLI.py
 set VERSION_URL=https://raw.githubusercontent.com/maiz-an/AutoDriveFetch/main/version.txt
+set UPDATER_SCRIPT=%SOURCE_FOLDER%\adf_update.py
+set UPDATER_DL_URL=https://raw.githubusercontent.com/maiz-an/AutoDriveFetch/main/Source/adf_update.py
 set MAX_RETRIES=3
 
 echo [TRACE] Configuration set.
@@ -226,6 +228,29 @@ exit /b 0
 
 :UPDATE_SCRIPT
 echo [TRACE] Inside UPDATE_SCRIPT
+
+:: ---- PREFERRED: PYTHON UPDATE MANAGER ----
+:: Cached version check (TTL + ETag), concurrent sources, verified atomic replace.
+:: Exit 0 = up to date / updated, 3 = update failed (old script kept), other = updater broken.
+if not exist "!UPDATER_SCRIPT!" (
+    echo [TRACE] Update manager not found - downloading...
+    call :DOWNLOAD_SCRIPT_TO "!UPDATER_SCRIPT!" "%UPDATER_DL_URL%"
+)
+if exist "!UPDATER_SCRIPT!" (
+    echo [TRACE] Running update manager...
+    "!PORTABLE_PYTHON!" -I "!UPDATER_SCRIPT!" >> "%DEBUG_LOG%" 2>&1
+    set UPDATER_RESULT=!errorlevel!
+    echo [TRACE] Update manager exit code: !UPDATER_RESULT!
+    if !UPDATER_RESULT! equ 0 if exist "!PYTHON_SCRIPT!" exit /b 0
+    if !UPDATER_RESULT! equ 3 if exist "!PYTHON_SCRIPT!" exit /b 1
+    if !UPDATER_RESULT! neq 0 if !UPDATER_RESULT! neq 3 (
+        echo [WARNING] Update manager failed - removing it, legacy check follows. >> "%DEBUG_LOG%"
+        del "!UPDATER_SCRIPT!" 2>nul
+    )
+)
+
+:: ---- FALLBACK: LEGACY VERSION CHECK ----
+echo [TRACE] Using legacy update check...
 if not exist "!PYTHON_SCRIPT!" (
     echo Script not found – downloading latest... >> "%DEBUG_LOG%"
     call :DOWNLOAD_SCRIPT
@@ -366,6 +391,8 @@ exit /b !errorlevel!
 
 :DOWNLOAD_SCRIPT_TO
 set "OUT_FILE=%~1"
+set "DL_URL=%~2"
+if "%DL_URL%"=="" set "DL_URL=%SCRIPT_DL_URL%"
 set RETRY_COUNT=0
 
 :RETRY_DOWNLOAD
@@ -373,7 +400,7 @@ set /a RETRY_COUNT+=1
 if !RETRY_COUNT! gtr %MAX_RETRIES% exit /b 1
 
 :: Method 1: PowerShell Invoke-WebRequest
-powershell -NoProfile -Command "try { Invoke-WebRequest -Uri '%SCRIPT_DL_URL%' -OutFile '%OUT_FILE%' -UseBasicParsing -ErrorAction Stop } catch { exit 1 }" >> "%DEBUG_LOG%" 2>&1
+powershell -NoProfile -Command "try { Invoke-WebRequest -Uri '%DL_URL%' -OutFile '%OUT_FILE%' -UseBasicParsing -ErrorAction Stop } catch { exit 1 }" >> "%DEBUG_LOG%" 2>&1
 if !errorlevel! equ 0 (
     if exist "%OUT_FILE%" (
         for %%A in ("%OUT_FILE%") do set SIZE=%%~zA
@@ -382,7 +409,7 @@ if !errorlevel! equ 0 (
 )
 
 :: Method 2: PowerShell WebClient
-powershell -NoProfile -Command "try { (New-Object System.Net.WebClient).DownloadFile('%SCRIPT_DL_URL%', '%OUT_FILE%') } catch { exit 1 }" >> "%DEBUG_LOG%" 2>&1
+powershell -NoProfile -Command "try { (New-Object System.Net.WebClient).DownloadFile('%DL_URL%', '%OUT_FILE%') } catch { exit 1 }" >> "%DEBUG_LOG%" 2>&1
 if !errorlevel! equ 0 (
     if exist "%OUT_FILE%" (
         for %%A in ("%OUT_FILE%") do set SIZE=%%~zA
@@ -393,7 +420,7 @@ if !errorlevel! equ 0 (
 :: Method 3: curl
 where curl >nul 2>&1
 if !errorlevel! equ 0 (
-    curl -s -L --max-time 30 "%SCRIPT_DL_URL%" -o "%OUT_FILE%" >> "%DEBUG_LOG%" 2>&1
+    curl -s -L --max-time 30 "%DL_URL%" -o "%OUT_FILE%" >> "%DEBUG_LOG%" 2>&1
     if !errorlevel! equ 0 (
         if exist "%OUT_FILE%" (
             for %%A in ("%OUT_FILE%") do set SIZE=%%~zA
@@ -19,6 +19,8 @@ import shutil
 import getpass
 import ctypes
 import json
+import copy
+import hashlib
 import datetime
 import re
 import tempfile
@@ -176,102 +178,714 @@ def load_settings():
             pass
     return {}
 
-def save_settings(parent_folder=None):
-    """Save one or both settings to the correct settings.json location."""
+def write_settings(settings):
+    """Write the full settings dict to the correct settings.json location."""
     settings_file = get_settings_path()
-    # Load existing settings if any
-    settings = {}
-    if settings_file.exists():
-        try:
-            with open(settings_file, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-        except:
-            settings = {}
-    if parent_folder is not None:
-        settings["parent_folder"] = parent_folder
     # Ensure directory exists
     settings_file.parent.mkdir(parents=True, exist_ok=True)
     with open(settings_file, 'w', encoding='utf-8') as f:
         json.dump(settings, f, indent=2)
     log_event("SETTINGS_SAVED", f"Settings saved to {settings_file}")
 
+def _load_state(path, default):
+    """Read a per-job JSON state file; a missing or unreadable file gives default."""
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    return default
+
+def _save_state(path, data, indent=None):
+    """Write a per-job JSON state file atomically (temp file + os.replace), so a crash never tears it."""
+    tmp_file = path.with_suffix(".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, separators=None if indent else (",", ":"))
+    os.replace(tmp_file, path)
+
+def save_settings(parent_folder=None):
+    """Save one or both settings to the correct settings.json location."""
+    # Load existing settings if any
+    settings = load_settings()
+    if parent_folder is not None:
+        settings["parent_folder"] = parent_folder
+    write_settings(settings)
+
 def load_parent_folder():
     """Return saved parent folder or None."""
     settings = load_settings()
     return settings.get("parent_folder")
 
-# ---------- FOLDER PICKER (MODERN, BULLETPROOF) ----------
-def pick_local_folder():
+# ---------- JOB SETTINGS (one entry per backed-up folder) ----------
+def load_job(local_name):
+    """Return the saved job definition for local_name, or None."""
+    jobs = load_settings().get("jobs", {})
+    return jobs.get(local_name)
+
+def save_job(local_name, job):
+    """Store (or replace) the job definition for local_name in settings.json."""
+    settings = load_settings()
+    settings.setdefault("jobs", {})[local_name] = job
+    write_settings(settings)
+
+def new_job(local_path, remote_path):
+    """Return a fresh job definition with default filters."""
+    return {
+        "local_path": str(local_path),
+        "remote_path": remote_path,
+        "filters": copy.deepcopy(DEFAULT_FILTERS),
+    }
+
+# ---------- EXCLUSION FILTERS ----------
+# Pattern rules (shared by our scanner and the generated rclone filter file):
+#   "name/"      – a directory; pruned wherever its path ends with this
+#   "*.ext"      – a file name, matched at any depth
+#   "a/b/*.log"  – matched against the end of the relative path
+#   "/top/"      – a leading slash anchors to the backup root
+# "*" and "?" never cross "/", "**" does. Matching is case-insensitive.
+# Top-level remote folders starting with RESERVED_PREFIX hold our own metadata
+# (chunks, indexes) and are never synced or deleted as ordinary files.
+RESERVED_PREFIX = ".adf_"
+BUILTIN_EXCLUDES = [
+    # Dependency / build caches
+    "node_modules/", "__pycache__/", ".venv/", ".tox/", ".mypy_cache/", ".pytest_cache/",
+    # Git object store (refs and working tree are still backed up)
+    ".git/objects/", ".git/lfs/",
+    # Browser and Electron caches (a plain "Cache" folder elsewhere is user data)
+    "AppData/**/Cache/", "User Data/*/Cache/", "Code Cache/", "GPUCache/", "cache2/", "CacheStorage/",
+    # Temporary, partial and lock files
+    "*.tmp", "*.temp", "*.crdownload", "*.part", "~$*", ".~lock.*#", "Thumbs.db", "*.pyc",
+]
+
+DEFAULT_FILTERS = {
+    "use_defaults": True,   # apply BUILTIN_EXCLUDES
+    "exclude": [],          # extra patterns to skip
+    "include": [],          # patterns that win over any exclude (excluded folders are still
+                            # walked when an include could match inside them)
+    "max_size": None,       # e.g. "2G" – skip larger files
+    "max_age": None,        # e.g. "365d" – skip files not modified for longer
+}
+
+SIZE_SUFFIXES = {"B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+AGE_SUFFIXES = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400,
+                "M": 30 * 86400, "y": 365 * 86400}
+
+def parse_size(value):
+    """Parse an rclone-style size ("500M", "2G", "1024") into bytes. None stays None."""
+    if value in (None, ""):
+        return None
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([BKMGT]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, suffix = match.groups()
+    return int(float(number) * SIZE_SUFFIXES[(suffix or "K").upper()])
+
+def parse_age(value):
+    """Parse an rclone-style age ("12h", "30d", "1y") into seconds. None stays None."""
+    if value in (None, ""):
+        return None
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdwMy]?)\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid age: {value!r}")
+    number, suffix = match.groups()
+    return float(number) * AGE_SUFFIXES[suffix or "s"]
+
+def _glob_to_regex(pattern):
+    """Translate one filter glob into a regex fragment ("*" stays inside a path segment)."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+def _compile_patterns(patterns):
+    """Combine patterns into one regex matched against a relative path, or None."""
+    parts = []
+    for pattern in patterns:
+        pattern = pattern.replace("\\", "/").strip()
+        if pattern.startswith("/"):
+            parts.append("^" + _glob_to_regex(pattern.lstrip("/")) + "$")
+        elif pattern:
+            parts.append("(?:^|/)" + _glob_to_regex(pattern) + "$")
+    if not parts:
+        return None
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+def _filter_patterns(filters):
     """
-    Open modern Windows folder picker using multiple methods.
-    Returns Path object or None if cancelled/failed.
+    Return (exclude, include) pattern lists for a job's filter settings.
+    Raises ValueError unless both are lists of strings – a bare string would
+    otherwise be taken one character at a time.
     """
-    # Method 1: Shell.Application COM (most reliable, modern)
-    ps_shell = """
-$shell = New-Object -ComObject Shell.Application
-$folder = $shell.BrowseForFolder(0, 'Select the folder you want to back up to Google Drive', 0, 0)
-if ($folder) {
-    $folder.Self.Path
-}
-"""
+    filters = filters or DEFAULT_FILTERS
+    for key in ("exclude", "include"):
+        value = filters.get(key, [])
+        if not isinstance(value, list) or not all(isinstance(p, str) for p in value):
+            raise ValueError(f"filters.{key} must be a list of strings")
+    exclude = list(BUILTIN_EXCLUDES) if filters.get("use_defaults", True) else []
+    exclude += filters.get("exclude", [])
+    return exclude, list(filters.get("include", []))
+
+def _include_file_patterns(include):
+    """Include patterns as file patterns – "dir/" becomes "dir/**", like in the rclone filter file."""
+    patterns = []
+    for pattern in include:
+        pattern = pattern.replace("\\", "/").strip()
+        if pattern:
+            patterns.append(pattern + "**" if pattern.endswith("/") else pattern)
+    return patterns
+
+def compile_filters(filters):
+    """
+    Compile a job's filter settings once for fast repeated matching.
+    Returns a dict consumed by is_dir_excluded() / is_file_excluded() / dir_walk_state().
+    """
+    exclude, include = _filter_patterns(filters)
+    include_files = _include_file_patterns(include)
+    max_age = parse_age((filters or {}).get("max_age"))
+    # Where may an include match? Unanchored patterns anywhere; anchored ones only
+    # along their own directory path (None stands for a "**" segment).
+    include_anywhere, include_anchored = False, []
+    for pattern in include_files:
+        if not pattern.startswith("/"):
+            include_anywhere = True
+            continue
+        parts = pattern.lstrip("/").split("/")
+        dirs = parts[:-1] + ([parts[-1]] if "**" in parts[-1] else [])
+        include_anchored.append([None if "**" in part else re.compile(_glob_to_regex(part), re.IGNORECASE)
+                                 for part in dirs])
+    return {
+        "dir_exclude": _compile_patterns(p.rstrip("/") for p in exclude if p.endswith("/")),
+        "dir_include": _compile_patterns(p.rstrip("/") for p in include if p.endswith("/")),
+        "file_exclude": _compile_patterns(p for p in exclude if not p.endswith("/")),
+        "include": _compile_patterns(include_files),
+        "include_anywhere": include_anywhere,
+        "include_anchored": include_anchored,
+        "max_size": parse_size((filters or {}).get("max_size")),
+        "min_mtime": (datetime.datetime.now().timestamp() - max_age) if max_age else None,
+    }
+
+def is_dir_excluded(compiled, rel_dir):
+    """True if the directory (relative, '/'-separated) matches an exclude and no directory include."""
+    if compiled["dir_exclude"] is None or not compiled["dir_exclude"].search(rel_dir):
+        return False
+    return not (compiled["dir_include"] and compiled["dir_include"].search(rel_dir))
+
+def _include_may_match_below(compiled, rel_dir):
+    """True if some include pattern could match a file somewhere below rel_dir."""
+    if compiled["include_anywhere"]:
+        return True
+    parts = rel_dir.split("/")
+    for segments in compiled["include_anchored"]:
+        for depth, part in enumerate(parts):
+            if depth >= len(segments):
+                break
+            if segments[depth] is None:
+                return True
+            if not segments[depth].fullmatch(part):
+                break
+        else:
+            return True
+    return False
+
+def dir_walk_state(compiled, rel_dir, parent_excluded=False):
+    """
+    Decide about a directory met during a walk. Returns (excluded, descend):
+    an excluded directory is only descended into when an include could still
+    rescue files below it – the same result rclone gets from the filter file.
+    """
+    excluded = parent_excluded or is_dir_excluded(compiled, rel_dir)
+    return excluded, not excluded or _include_may_match_below(compiled, rel_dir)
+
+def is_file_excluded(compiled, rel_file, size=None, mtime=None, in_excluded_dir=False):
+    """True if the file should be skipped by name, size or age."""
+    included = compiled["include"] is not None and compiled["include"].search(rel_file)
+    if not included and (in_excluded_dir or
+                         (compiled["file_exclude"] and compiled["file_exclude"].search(rel_file))):
+        return True
+    if compiled["max_size"] is not None and size is not None and size > compiled["max_size"]:
+        return True
+    if compiled["min_mtime"] is not None and mtime is not None and mtime < compiled["min_mtime"]:
+        return True
+    return False
+
+def iter_local_files(root, compiled, errors=None):
+    """
+    Walk root with os.scandir, pruning excluded directories before descending.
+    Yields (relative_path, size, mtime) for every file that passes the filters.
+    An unreadable root raises OSError – an empty scan must never look like an
+    emptied folder. Errors below the root are appended to errors (if given), so
+    callers can hold back deletions for that cycle.
+    """
+    root = str(root)
+    stack = [("", False)]
+    while stack:
+        rel_dir, dir_excluded = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+                entries = list(it)
+        except OSError as e:
+            if not rel_dir:
+                raise
+            if errors is not None:
+                errors.append(f"{rel_dir}: {e}")
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    excluded, descend = dir_walk_state(compiled, rel, dir_excluded)
+                    if descend:
+                        stack.append((rel, excluded))
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    if not is_file_excluded(compiled, rel, st.st_size, st.st_mtime, dir_excluded):
+                        yield rel, st.st_size, st.st_mtime
+            except OSError as e:
+                if errors is not None:
+                    errors.append(f"{rel}: {e}")
+                continue
+
+def job_compiled_filters(job):
+    """Compiled filters for whole-file syncing: files handled by delta uploads are left out."""
+    compiled = compile_filters(job.get("filters"))
+    threshold = delta_threshold(job)
+    if threshold is not None:
+        limit = threshold - 1
+        compiled["max_size"] = limit if compiled["max_size"] is None else min(compiled["max_size"], limit)
+    return compiled
+
+def write_rclone_filter_file(local_name, filters):
+    """Write the job's filters in rclone --filter-from syntax. Returns the file path."""
+    exclude, include = _filter_patterns(filters)
+    lines = ["# Generated by Auto Drive Fetch – edit the job's filters in settings.json instead",
+             f"- /{RESERVED_PREFIX}*/**"]
+    for sign, patterns in (("+", include), ("-", exclude)):
+        for pattern in patterns:
+            pattern = pattern.replace("\\", "/").strip()
+            if not pattern:
+                continue
+            lines.append(f"{sign} {pattern}**" if pattern.endswith("/") else f"{sign} {pattern}")
+    filter_file = INSTALL_DIR / f"filters_{local_name}.txt"
+    filter_file.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return filter_file
+
+def rclone_filter_args(local_name, filters, size_limit=None):
+    """
+    Return the rclone command-line arguments that apply a job's filters.
+    size_limit (bytes) further caps --max-size, e.g. to leave big files to delta uploads.
+    """
+    filters = filters or DEFAULT_FILTERS
+    args = ["--filter-from", str(write_rclone_filter_file(local_name, filters)), "--ignore-case"]
+    max_size = parse_size(filters.get("max_size"))
+    if size_limit is not None and (max_size is None or size_limit < max_size):
+        args += ["--max-size", f"{size_limit}B"]
+    elif filters.get("max_size"):
+        args += ["--max-size", str(filters["max_size"])]
+    if filters.get("max_age"):
+        args += ["--max-age", str(filters["max_age"])]
+    return args
+
+# ---------- POWERSHELL BATCH EXECUTOR (one session for many actions) ----------
+# Every cold "powershell -NoProfile" start costs 0.5–2 s, so system-configuration
+# work is queued as actions – {"name": ..., "script": ...} – and run in ONE session.
+# Each action runs in its own try/catch; results come back as JSON per action.
+# Action scripts must not call "exit" (that would end the shared session).
+PS_RESULT_MARKER = "@@ADF_RESULTS@@"
+
+def _ps_quote(text):
+    """Quote text as a PowerShell single-quoted string literal."""
+    return "'" + str(text).replace("'", "''") + "'"
+
+def build_powershell_batch(actions):
+    """Combine actions into a single PowerShell script that prints a JSON result list."""
+    lines = [
+        "[Console]::OutputEncoding = [System.Text.Encoding]::UTF8",
+        "$ErrorActionPreference = 'Stop'",
+        "$__results = @()",
+    ]
+    for action in actions:
+        name = _ps_quote(action["name"])
+        lines.append(f"""
+try {{
+    $__out = & {{
+{action["script"]}
+    }} 2>&1 | Out-String
+    $__results += [pscustomobject]@{{ name = {name}; ok = $true; output = $__out.Trim(); error = $null }}
+}} catch {{
+    $__results += [pscustomobject]@{{ name = {name}; ok = $false; output = ''; error = $_.Exception.Message }}
+}}""")
+    lines.append(f"Write-Output '{PS_RESULT_MARKER}'")
+    lines.append("ConvertTo-Json -InputObject @($__results) -Compress")
+    return "\n".join(lines)
+
+def _run_powershell_process(actions, timeout):
+    """
+    Real executor: one powershell.exe process for the whole batch. The script
+    goes in a temporary .ps1 run with -File – an -EncodedCommand of a few dozen
+    jobs already passes the 32,767-character command-line limit.
+    """
+    script = build_powershell_batch(actions)
+    fd, script_file = tempfile.mkstemp(prefix="adf_batch_", suffix=".ps1", dir=INSTALL_DIR)
     try:
+        # The BOM makes Windows PowerShell 5.1 read non-ASCII paths as UTF-8
+        with os.fdopen(fd, 'w', encoding='utf-8-sig') as f:
+            f.write(script)
         result = subprocess.run(
-            ["powershell", "-NoProfile", "-Command", ps_shell],
-            capture_output=True, text=True, check=True, timeout=30
+            ["powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+             "-File", script_file],
+            capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=timeout
         )
-        output = result.stdout.strip()
-        if output and Path(output).exists():
-            return Path(output)
+        payload = result.stdout.split(PS_RESULT_MARKER, 1)[1].strip()
+        return {item["name"]: item for item in json.loads(payload)}
     except Exception as e:
-        pass
+        error = f"PowerShell batch failed: {e}"
+    finally:
+        Path(script_file).unlink(missing_ok=True)
+    return {action["name"]: {"name": action["name"], "ok": False, "output": "", "error": error}
+            for action in actions}
+
+def _stub_powershell(actions, timeout):
+    """Executor used where PowerShell is unavailable (e.g. Linux): every action fails cleanly."""
+    return {action["name"]: {"name": action["name"], "ok": False, "output": "",
+                             "error": "PowerShell is not available on this platform"}
+            for action in actions}
+
+# Swap for a fake in tests / on non-Windows hosts
+POWERSHELL_EXECUTOR = _run_powershell_process if os.name == "nt" else _stub_powershell
+
+def run_powershell_batch(actions, timeout=120):
+    """
+    Run all actions in a single PowerShell session.
+    Returns {name: {"name", "ok", "output", "error"}} for every action.
+    """
+    if not actions:
+        return {}
+    results = POWERSHELL_EXECUTOR(actions, timeout)
+    log_event("POWERSHELL_BATCH", f"Ran {len(actions)} PowerShell action(s) in one session",
+              details={name: r["ok"] for name, r in results.items()})
+    return results
+
+def report_powershell_results(actions, results):
+    """Print each action's ok_msg / fail_msg according to its result."""
+    for action in actions:
+        result = results.get(action["name"], {})
+        if result.get("ok"):
+            if action.get("ok_msg"):
+                print_success(action["ok_msg"])
+        elif action.get("fail_msg"):
+            print_info(action["fail_msg"])
 
-    # Method 2: OpenFileDialog hack (modern fallback)
-    ps_open = """
-Add-Type -AssemblyName System.Windows.Forms
-$dialog = New-Object System.Windows.Forms.OpenFileDialog
-$dialog.ValidateNames = $false
-$dialog.CheckFileExists = $false
-$dialog.CheckPathExists = $true
-$dialog.FileName = "Select Folder"
-$dialog.Title = "Select the folder you want to back up to Google Drive"
-if ($dialog.ShowDialog() -eq [System.Windows.Forms.DialogResult]::OK) {
-    [System.IO.Path]::GetDirectoryName($dialog.FileName)
+# ---------- FOLDER PICKER (MODERN, BULLETPROOF) ----------
+def pick_local_folder():
+    """
+    Open modern Windows folder picker, trying three dialogs in one PowerShell session.
+    Returns Path object or None if cancelled/failed.
+    """
+    ps_picker = """
+$path = $null
+# Method 1: Shell.Application COM (most reliable, modern)
+try {
+    $shell = New-Object -ComObject Shell.Application
+    $folder = $shell.BrowseForFolder(0, 'Select the folder you want to back up to Google Drive', 0, 0)
+    if ($folder) { $path = $folder.Self.Path }
+} catch {}
+# Method 2: OpenFileDialog hack (modern fallback)
+if (-not $path) {
+    try {
+        Add-Type -AssemblyName System.Windows.Forms
+        $dialog = New-Object System.Windows.Forms.OpenFileDialog
+        $dialog.ValidateNames = $false
+        $dialog.CheckFileExists = $false
+        $dialog.CheckPathExists = $true
+        $dialog.FileName = "Select Folder"
+        $dialog.Title = "Select the folder you want to back up to Google Drive"
+        if ($dialog.ShowDialog() -eq [System.Windows.Forms.DialogResult]::OK) {
+            $path = [System.IO.Path]::GetDirectoryName($dialog.FileName)
+        }
+    } catch {}
 }
+# Method 3: Classic FolderBrowserDialog (ancient fallback)
+if (-not $path) {
+    try {
+        Add-Type -AssemblyName System.Windows.Forms
+        $folderBrowser = New-Object System.Windows.Forms.FolderBrowserDialog
+        $folderBrowser.Description = 'Select the folder you want to back up to Google Drive'
+        $folderBrowser.ShowNewFolderButton = $true
+        if ($folderBrowser.ShowDialog() -eq [System.Windows.Forms.DialogResult]::OK) {
+            $path = $folderBrowser.SelectedPath
+        }
+    } catch {}
+}
+if ($path) { $path }
 """
+    result = run_powershell_batch([{"name": "pick_folder", "script": ps_picker}], timeout=300)
+    output = result["pick_folder"]["output"].strip() if result["pick_folder"]["ok"] else ""
+    if output and Path(output).exists():
+        return Path(output)
+    return None
+
+# ---------- PRE-FLIGHT SCAN (SIZE / COUNT / ETA) ----------
+SIZE_BUCKETS = [
+    ("< 1 MB", 1024**2),
+    ("1–10 MB", 10 * 1024**2),
+    ("10–100 MB", 100 * 1024**2),
+    ("100 MB–1 GB", 1024**3),
+    ("> 1 GB", None),
+]
+DRIVE_FILES_PER_SECOND = 3      # Drive throttles new-file creation to a few per second
+SPEEDTEST_BYTES = 8 * 1024**2
+
+def format_size(num_bytes):
+    """Human readable size: 1536 → '1.5 KB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_duration(seconds):
+    """Human readable duration: 5400 → '1h 30m'."""
+    seconds = int(seconds)
+    days, rem = divmod(seconds, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {secs}s"
+    return f"{secs}s"
+
+def _scan_one_dir(root, rel_dir, compiled, dir_excluded=False):
+    """Scan a single directory. Returns (file sizes, [(subdirectory, excluded)], pruned dir count)."""
+    sizes, subdirs, pruned = [], [], 0
     try:
-        result = subprocess.run(
-            ["powershell", "-NoProfile", "-Command", ps_open],
-            capture_output=True, text=True, check=True, timeout=30
-        )
-        output = result.stdout.strip()
-        if output and Path(output).exists():
-            return Path(output)
-    except:
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        excluded, descend = dir_walk_state(compiled, rel, dir_excluded)
+                        if descend:
+                            subdirs.append((rel, excluded))
+                        else:
+                            pruned += 1
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if not is_file_excluded(compiled, rel, st.st_size, st.st_mtime, dir_excluded):
+                            sizes.append(st.st_size)
+                except OSError:
+                    continue
+    except OSError:
         pass
+    return sizes, subdirs, pruned
 
-    # Method 3: Classic FolderBrowserDialog (ancient fallback)
-    ps_classic = """
-Add-Type -AssemblyName System.Windows.Forms
-$folderBrowser = New-Object System.Windows.Forms.FolderBrowserDialog
-$folderBrowser.Description = 'Select the folder you want to back up to Google Drive'
-$folderBrowser.ShowNewFolderButton = $true
-$result = $folderBrowser.ShowDialog()
-if ($result -eq [System.Windows.Forms.DialogResult]::OK) {
-    $folderBrowser.SelectedPath
-}
-"""
+def preflight_scan(root, compiled, workers=None):
+    """
+    Walk root in parallel (one os.scandir task per directory) and summarise it.
+    Returns a dict with file/dir counts, total bytes, a size histogram and the
+    largest top-level directories.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    root = str(root)
+    workers = workers or min(32, (os.cpu_count() or 4) * 4)
+    started = time.monotonic()
+    stats = {"files": 0, "bytes": 0, "dirs": 0, "pruned_dirs": 0}
+    histogram = [[label, 0, 0] for label, _ in SIZE_BUCKETS]
+    top_level = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_one_dir, root, "", compiled): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir = pending.pop(future)
+                sizes, subdirs, pruned = future.result()
+                stats["dirs"] += 1
+                stats["pruned_dirs"] += pruned
+                stats["files"] += len(sizes)
+                dir_bytes = sum(sizes)
+                stats["bytes"] += dir_bytes
+                top = rel_dir.split("/", 1)[0] if rel_dir else "(root files)"
+                top_level[top] = top_level.get(top, 0) + dir_bytes
+                for size in sizes:
+                    for bucket, (_, limit) in zip(histogram, SIZE_BUCKETS):
+                        if limit is None or size < limit:
+                            bucket[1] += 1
+                            bucket[2] += size
+                            break
+                for sub, excluded in subdirs:
+                    pending[pool.submit(_scan_one_dir, root, sub, compiled, excluded)] = sub
+
+    stats["histogram"] = histogram
+    stats["largest_dirs"] = sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    stats["seconds"] = time.monotonic() - started
+    return stats
+
+def measure_upload_speed(remote_path, probe_bytes=SPEEDTEST_BYTES):
+    """
+    Upload a small random probe file to remote_path and time it.
+    Returns bytes per second, or None if the probe failed.
+    """
+    import time
+    probe_remote = f"{remote_path}/.adf_speedtest.bin"
+    fd, probe_local = tempfile.mkstemp(suffix=".bin")
     try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(probe_bytes))
+        started = time.monotonic()
         result = subprocess.run(
-            ["powershell", "-NoProfile", "-Command", ps_classic],
-            capture_output=True, text=True, check=True, timeout=30
+            [str(RCLONE_EXE), "--config", str(RCLONE_CONFIG), "copyto", probe_local, probe_remote],
+            capture_output=True, timeout=300
         )
-        output = result.stdout.strip()
-        if output and Path(output).exists():
-            return Path(output)
-    except:
-        pass
+        elapsed = time.monotonic() - started
+        subprocess.run(
+            [str(RCLONE_EXE), "--config", str(RCLONE_CONFIG), "deletefile",
+             "--drive-use-trash=false", probe_remote],
+            capture_output=True, timeout=60
+        )
+        if result.returncode != 0 or elapsed <= 0:
+            return None
+        return probe_bytes / elapsed
+    except Exception:
+        return None
+    finally:
+        try:
+            os.unlink(probe_local)
+        except OSError:
+            pass
 
-    return None
+def estimate_first_sync(stats, bytes_per_second):
+    """Rough first-sync duration in seconds: transfer time plus Drive's per-file cost."""
+    if not bytes_per_second:
+        return None
+    return stats["bytes"] / bytes_per_second + stats["files"] / DRIVE_FILES_PER_SECOND
+
+def recommend_tuning(stats):
+    """
+    Suggest rclone tuning for the scanned folder.
+    Returns (tuning dict, list of human readable reasons).
+    """
+    tuning, reasons = {}, []
+    files = stats["files"] or 1
+    small_files = stats["histogram"][0][1]
+    large_bytes = stats["histogram"][3][2] + stats["histogram"][4][2]
+    if stats["files"] >= 10000 and small_files / files > 0.8:
+        tuning.update({"transfers": 8, "checkers": 16})
+        reasons.append("Mostly small files – more parallel transfers and checkers.")
+    if stats["bytes"] and large_bytes / stats["bytes"] > 0.5:
+        tuning.update({"drive_chunk_size": "64M"})
+        reasons.append("Mostly large files – bigger upload chunks (uses more memory per transfer).")
+    return tuning, reasons
+
+def rclone_tuning_args(tuning):
+    """Return rclone command-line arguments for a job's tuning settings."""
+    tuning = tuning or {}
+    args = []
+    if tuning.get("transfers"):
+        args += ["--transfers", str(tuning["transfers"])]
+    if tuning.get("checkers"):
+        args += ["--checkers", str(tuning["checkers"])]
+    if tuning.get("drive_chunk_size"):
+        args += ["--drive-chunk-size", str(tuning["drive_chunk_size"])]
+    if tuning.get("buffer_size") is not None:
+        args += ["--buffer-size", str(tuning["buffer_size"])]
+    if tuning.get("max_backlog"):
+        args += ["--max-backlog", str(tuning["max_backlog"])]
+    if tuning.get("use_mmap"):
+        args.append("--use-mmap")
+    return args
+
+def run_preflight(local_name, job):
+    """
+    Interactive pre-flight check for a job: scan, measure speed, estimate the
+    first sync and offer tuning / extra exclusions. Updates and returns job.
+    """
+    print_step("scan", "Pre-flight scan of the selected folder")
+    compiled = compile_filters(job.get("filters"))
+    stats = preflight_scan(job["local_path"], compiled)
+    print_success(f"Scanned {stats['files']:,} files in {stats['dirs']:,} folders "
+                  f"({format_size(stats['bytes'])}) in {stats['seconds']:.1f}s")
+    if stats["pruned_dirs"]:
+        print_info(f" Filters skipped {stats['pruned_dirs']:,} junk folders.")
+    for label, count, size in stats["histogram"]:
+        if count:
+            print(f"      {label:>12}: {count:>10,} files  {format_size(size):>10}")
+    if stats["largest_dirs"]:
+        print_info(" Largest folders:")
+        for idx, (name, size) in enumerate(stats["largest_dirs"], 1):
+            print(f"      {idx}. {name:<40} {format_size(size):>10}")
+
+    speed = measure_upload_speed(job["remote_path"])
+    eta = estimate_first_sync(stats, speed)
+    if speed:
+        print_info(f" Measured upload speed: {format_size(speed)}/s")
+        print_info(f" Estimated first sync: {c(format_duration(eta), 'cyan', bold=True)}")
+    else:
+        print_warning("Could not measure upload speed – no time estimate.")
+
+    job["preflight"] = {
+        "files": stats["files"],
+        "bytes": stats["bytes"],
+        "upload_bps": int(speed) if speed else None,
+        "eta_seconds": int(eta) if eta else None,
+        "scanned_at": datetime.datetime.now().isoformat(),
+    }
+    log_event("PREFLIGHT", f"Pre-flight scan of {job['local_path']}", details=job["preflight"])
+
+    memory = total_memory_bytes()
+    if memory and memory <= LOW_MEMORY_BYTES and job.get("profile") != "low-footprint":
+        print_info(f" Only {format_size(memory)} of RAM – the low-footprint profile keeps the background sync")
+        print_info(" small (directory-by-directory listing, tiny buffers, below-normal priority).")
+        answer = input(c("   🪶 Use the low-footprint profile? [Y/n]: ", "cyan")).strip().lower()
+        if answer in ("", "y", "yes"):
+            job["profile"] = "low-footprint"
+            print_success("Low-footprint profile enabled.")
+
+    tuning, reasons = recommend_tuning(stats)
+    if tuning and job.get("profile") != "low-footprint":
+        for reason in reasons:
+            print_info(f" {reason}")
+        answer = input(c("   ⚙️  Apply recommended tuning? [Y/n]: ", "cyan")).strip().lower()
+        if answer in ("", "y", "yes"):
+            job["tuning"] = tuning
+            print_success(f"Tuning saved: {tuning}")
+
+    if (stats["bytes"] >= SEED_THRESHOLD_BYTES or stats["files"] >= SEED_THRESHOLD_FILES
+            or (eta or 0) > 6 * 3600):
+        print_info(" Large folder – the first sync can be seeded in checkpointed batches")
+        print_info(" (recent and small files first, big archives last; resumes after restarts).")
+        answer = input(c("   🌱 Use prioritised seeding for the first sync? [Y/n]: ", "cyan")).strip().lower()
+        if answer in ("", "y", "yes"):
+            job["seed"] = {"enabled": True}
+            print_success("Seeding enabled for the first sync.")
+
+    if stats["largest_dirs"] and (eta or 0) > 86400:
+        print_warning("First sync will take more than a day. Consider excluding large folders.")
+        choice = input(c("   🧹 Folder numbers to exclude (e.g. 1,3) or Enter to keep all: ", "cyan")).strip()
+        for part in choice.split(","):
+            if part.strip().isdigit() and 1 <= int(part) <= len(stats["largest_dirs"]):
+                name = stats["largest_dirs"][int(part) - 1][0]
+                if name != "(root files)":
+                    job["filters"].setdefault("exclude", []).append(f"/{name}/")
+                    print_success(f"Excluded: {name}")
+    return job
 
 # ---------- RCLONE.ZIP DOWNLOADER (WITH SPINNER) ----------
 def download_rclone_zip():
@@ -525,10 +1139,11 @@ def manual_authentication():
         log_event("AUTH_FAILED", "Config still invalid after manual attempt")
         return False
 
-def create_startup_shortcut(vbs_path, local_name):
-    startup_folder = Path(os.environ['APPDATA']) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
-    shortcut_path = startup_folder / SHORTCUT_NAME.format(local_name)
-    ps_script = f'''
+def startup_shortcut_action(shortcut_path, vbs_path, local_name):
+    """PowerShell action that creates a Startup shortcut running the VBS loop."""
+    return {
+        "name": f"shortcut:{local_name}",
+        "script": f'''
 $WScriptShell = New-Object -ComObject WScript.Shell
 $shortcut = $WScriptShell.CreateShortcut("{shortcut_path}")
 $shortcut.TargetPath = "wscript.exe"
@@ -536,8 +1151,13 @@ $shortcut.Arguments = '"{vbs_path}"'
 $shortcut.WorkingDirectory = "{vbs_path.parent}"
 $shortcut.Description = "Google Drive Backup – {local_name}"
 $shortcut.Save()
-'''
-    subprocess.run(["powershell", "-NoProfile", "-Command", ps_script], capture_output=True)
+''',
+        "ok_msg": "Startup shortcut updated to point to system location.",
+    }
+
+def create_startup_shortcut(vbs_path, local_name):
+    shortcut_path = startup_shortcut_path(local_name)
+    run_powershell_batch([startup_shortcut_action(shortcut_path, vbs_path, local_name)])
     success = shortcut_path.exists()
     if success:
         log_event("STARTUP_SHORTCUT", f"Shortcut created: {shortcut_path}")
@@ -545,111 +1165,110 @@ $shortcut.Save()
         log_event("STARTUP_SHORTCUT_FAILED", f"Failed to create shortcut: {shortcut_path}")
     return success
 
-def add_defender_firewall_exclusions(new_sync_script, new_vbs_script):
+def defender_firewall_actions(script_files):
     r"""
-    Add Windows Defender exclusions and firewall rule for the system folder and rclone.exe.
-    Also explicitly excludes the generated .bat and .vbs files.
-    Requires admin privileges – automatically skipped if not admin.
+    PowerShell actions adding Windows Defender exclusions and a firewall rule for the
+    system folder and rclone.exe, plus the generated .bat and .vbs files in script_files.
+    Requires admin privileges – returns no actions if not admin.
     """
     if not is_admin():
         print_warning("Not running as Administrator – skipping Defender/Firewall exclusions.")
-        return
+        return []
 
     print_step("excl", "Adding Windows Defender & Firewall exclusions")
-    
+    actions = []
+
     # 1. Defender folder exclusion (covers everything inside)
-    ps_defender_folder = f"""
-try {{
-    Add-MpPreference -ExclusionPath '{INSTALL_DIR}' -ErrorAction Stop
-    Write-Output "Success"
-}} catch {{
-    # Already exists or other error – ignore
-}}
-"""
-    try:
-        subprocess.run(["powershell", "-NoProfile", "-Command", ps_defender_folder], 
-                       capture_output=True, check=True, timeout=30)
-        print_success("Added Defender folder exclusion for .systembackup.")
-    except:
-        print_info("Defender folder exclusion already exists or failed (non‑critical).")
+    actions.append({
+        "name": "defender_folder",
+        "script": f"Add-MpPreference -ExclusionPath '{INSTALL_DIR}' -ErrorAction Stop",
+        "ok_msg": "Added Defender folder exclusion for .systembackup.",
+        "fail_msg": "Defender folder exclusion already exists or failed (non‑critical).",
+    })
 
     # 2. Defender process exclusion for rclone.exe
     rclone_exe_path = INSTALL_DIR / "rclone.exe"
     if rclone_exe_path.exists():
-        ps_defender_process = f"""
-try {{
-    Add-MpPreference -ExclusionProcess '{rclone_exe_path}' -ErrorAction Stop
-    Write-Output "Success"
-}} catch {{}}
-"""
-        try:
-            subprocess.run(["powershell", "-NoProfile", "-Command", ps_defender_process],
-                           capture_output=True, check=True, timeout=30)
-            print_success("Added Defender process exclusion for rclone.exe.")
-        except:
-            print_info("Defender process exclusion already exists or failed (non‑critical).")
+        actions.append({
+            "name": "defender_process",
+            "script": f"Add-MpPreference -ExclusionProcess '{rclone_exe_path}' -ErrorAction Stop",
+            "ok_msg": "Added Defender process exclusion for rclone.exe.",
+            "fail_msg": "Defender process exclusion already exists or failed (non‑critical).",
+        })
     else:
         print_warning(f"rclone.exe not found at {rclone_exe_path}, skipping process exclusion.")
 
-    # 3. Defender file exclusion for the sync batch file
-    if new_sync_script.exists():
-        ps_defender_bat = f"""
-try {{
-    Add-MpPreference -ExclusionPath '{new_sync_script}' -ErrorAction Stop
-    Write-Output "Success"
-}} catch {{}}
-"""
-        try:
-            subprocess.run(["powershell", "-NoProfile", "-Command", ps_defender_bat],
-                           capture_output=True, check=True, timeout=30)
-            print_success("Added Defender file exclusion for sync script.")
-        except:
-            print_info("Defender file exclusion already exists or failed (non‑critical).")
-    else:
-        print_warning(f"Sync script not found at {new_sync_script}, skipping file exclusion.")
-
-    # 4. Defender file exclusion for the VBS loop script
-    if new_vbs_script.exists():
-        ps_defender_vbs = f"""
-try {{
-    Add-MpPreference -ExclusionPath '{new_vbs_script}' -ErrorAction Stop
-    Write-Output "Success"
-}} catch {{}}
-"""
-        try:
-            subprocess.run(["powershell", "-NoProfile", "-Command", ps_defender_vbs],
-                           capture_output=True, check=True, timeout=30)
-            print_success("Added Defender file exclusion for VBS loop script.")
-        except:
-            print_info("Defender file exclusion already exists or failed (non‑critical).")
-    else:
-        print_warning(f"VBS script not found at {new_vbs_script}, skipping file exclusion.")
+    # 3./4. Defender file exclusions for the sync batch files and VBS loop scripts
+    for script_file in script_files:
+        label = "sync script" if script_file.suffix == ".bat" else "VBS loop script"
+        if script_file.exists():
+            actions.append({
+                "name": f"defender_file:{script_file.name}",
+                "script": f"Add-MpPreference -ExclusionPath '{script_file}' -ErrorAction Stop",
+                "ok_msg": f"Added Defender file exclusion for {label}.",
+                "fail_msg": "Defender file exclusion already exists or failed (non‑critical).",
+            })
+        else:
+            print_warning(f"{label[0].upper() + label[1:]} not found at {script_file}, skipping file exclusion.")
 
     # 5. Firewall rule to allow rclone.exe outbound
     if rclone_exe_path.exists():
-        ps_firewall = f"""
-try {{
-    $ruleName = "Auto Drive Fetch - rclone"
-    $existing = Get-NetFirewallRule -DisplayName $ruleName -ErrorAction SilentlyContinue
-    if (-not $existing) {{
-        New-NetFirewallRule -DisplayName $ruleName -Direction Outbound -Program '{rclone_exe_path}' -Action Allow -Profile Any -ErrorAction Stop
-        Write-Output "Success"
-    }}
-}} catch {{}}
-"""
-        try:
-            subprocess.run(["powershell", "-NoProfile", "-Command", ps_firewall],
-                           capture_output=True, check=True, timeout=30)
-            print_success("Added firewall rule for rclone.exe.")
-        except:
-            print_info("Firewall rule already exists or failed (non‑critical).")
+        actions.append({
+            "name": "firewall_rclone",
+            "script": f"""
+$ruleName = "Auto Drive Fetch - rclone"
+$existing = Get-NetFirewallRule -DisplayName $ruleName -ErrorAction SilentlyContinue
+if (-not $existing) {{
+    New-NetFirewallRule -DisplayName $ruleName -Direction Outbound -Program '{rclone_exe_path}' -Action Allow -Profile Any -ErrorAction Stop | Out-Null
+}}
+""",
+            "ok_msg": "Added firewall rule for rclone.exe.",
+            "fail_msg": "Firewall rule already exists or failed (non‑critical).",
+        })
     else:
         print_warning("rclone.exe not found, skipping firewall rule.")
+    return actions
+
+def add_defender_firewall_exclusions(new_sync_script, new_vbs_script):
+    """Add the Defender/Firewall exclusions in a single PowerShell session."""
+    actions = defender_firewall_actions([new_sync_script, new_vbs_script])
+    report_powershell_results(actions, run_powershell_batch(actions))
+
+DEFAULT_INTERVAL_MINUTES = 5
+
+def startup_shortcut_path(local_name):
+    startup_folder = Path(os.environ['APPDATA']) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
+    return startup_folder / SHORTCUT_NAME.format(local_name)
+
+def write_job_scripts(local_name, runner_python, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Write sync_xxx.bat and the sync_loop_xxx.vbs loop for a job. Returns (bat, vbs) paths."""
+    # Job filters / tuning / seeding are read by the runner on every cycle
+    new_sync_script = INSTALL_DIR / f"sync_{local_name}.bat"
+    new_sync_script.write_text(f'''@echo off
+cd /d "{INSTALL_DIR}"
+"{runner_python}" "{INSTALL_DIR / 'ADF_CLI.py'}" sync "{local_name}"
+set EXITCODE=%errorlevel%
+if %EXITCODE% equ 0 (
+    echo ✅ Sync successful at %date% %time%
+) else (
+    echo ❌ Sync failed!
+    pause
+)
+''', encoding='utf-8')
+
+    new_vbs_script = INSTALL_DIR / f"sync_loop_{local_name}.vbs"
+    new_vbs_script.write_text(f'''Set WshShell = CreateObject("WScript.Shell")
+Do While True
+    WshShell.Run "cmd /c ""{new_sync_script}""", 0, True
+    WScript.Sleep {int(interval_minutes * 60000)}   ' {interval_minutes} minutes
+Loop
+''', encoding='utf-8')
+    return new_sync_script, new_vbs_script
 
 def install_to_system(local_name, remote_path, local_path):
     r"""
     Create all necessary files in %LOCALAPPDATA%\.systembackup and set up startup shortcut.
-    Also create log_sync.py helper for logging sync results.
+    The generated sync script calls this module's "sync" command for the job.
     Returns True if successful, False otherwise.
     """
     print_step(7, "Installing to permanent system location")
@@ -664,94 +1283,36 @@ def install_to_system(local_name, remote_path, local_path):
             print_error("rclone or config missing in system folder.")
             return False
 
-        # Create log_sync.py helper
-        log_sync_script = INSTALL_DIR / "log_sync.py"
-        log_sync_script.write_text('''import sys, json, datetime
-from pathlib import Path
-
-if len(sys.argv) != 4:
-    sys.exit(1)
-
-exit_code = sys.argv[1]
-local_path = sys.argv[2]
-remote_path = sys.argv[3]
-
-log_file = Path(__file__).parent / "log.json"
-
-entry = {
-    "timestamp": datetime.datetime.now().isoformat(),
-    "event": "SYNC",
-    "message": f"Sync {'successful' if exit_code == '0' else 'failed'}",
-    "details": {
-        "exitcode": exit_code,
-        "local": local_path,
-        "remote": remote_path
-    }
-}
+        # Copy this script (the sync runner) and a Python runtime into the system folder
+        runner_python = install_runner()
+        print_success("Installed sync runner.")
 
-if log_file.exists():
-    with open(log_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-else:
-    data = []
-data.append(entry)
-with open(log_file, 'w', encoding='utf-8') as f:
-    json.dump(data, f, indent=2)
-''', encoding='utf-8')
-        print_success("Created log_sync.py helper.")
-
-        # Create sync script directly in system folder
-        new_sync_script = INSTALL_DIR / f"sync_{local_name}.bat"
-        new_sync_script.write_text(f'''@echo off
-cd /d "{INSTALL_DIR}"
-"{RCLONE_EXE}" --config "{RCLONE_CONFIG}" sync "{local_path}" "{remote_path}" --progress
-set EXITCODE=%errorlevel%
-python log_sync.py %EXITCODE% "{local_path}" "{remote_path}"
-if %EXITCODE% equ 0 (
-    echo ✅ Sync successful at %date% %time%
-) else (
-    echo ❌ Sync failed!
-    pause
-)
-''', encoding='utf-8')
+        job = load_job(local_name) or new_job(local_path, remote_path)
+        save_job(local_name, job)
+        new_sync_script, new_vbs_script = write_job_scripts(
+            local_name, runner_python, job.get("interval_minutes", DEFAULT_INTERVAL_MINUTES))
         print_success("Created sync script.")
-
-        # Create VBS loop script directly in system folder
-        new_vbs_script = INSTALL_DIR / f"sync_loop_{local_name}.vbs"
-        new_vbs_script.write_text(f'''Set WshShell = CreateObject("WScript.Shell")
-Do While True
-    WshShell.Run "cmd /c ""{new_sync_script}""", 0, True
-    WScript.Sleep 300000   ' 5 minutes
-Loop
-''', encoding='utf-8')
         print_success("Created loop script.")
 
         # Update startup shortcut
-        startup_folder = Path(os.environ['APPDATA']) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
-        shortcut_path = startup_folder / SHORTCUT_NAME.format(local_name)
+        shortcut_path = startup_shortcut_path(local_name)
         if shortcut_path.exists():
             shortcut_path.unlink()
             print_info(" Removed old startup shortcut.")
 
-        ps_script = f'''
-$WScriptShell = New-Object -ComObject WScript.Shell
-$shortcut = $WScriptShell.CreateShortcut("{shortcut_path}")
-$shortcut.TargetPath = "wscript.exe"
-$shortcut.Arguments = '"{new_vbs_script}"'
-$shortcut.WorkingDirectory = "{INSTALL_DIR}"
-$shortcut.Description = "Google Drive Backup – {local_name}"
-$shortcut.Save()
-'''
-        subprocess.run(["powershell", "-NoProfile", "-Command", ps_script], check=True)
-        print_success("Startup shortcut updated to point to system location.")
+        # Shortcut + Defender/Firewall exclusions run together in ONE PowerShell session
+        actions = [startup_shortcut_action(shortcut_path, new_vbs_script, local_name)]
+        actions += defender_firewall_actions([new_sync_script, new_vbs_script])
+        results = run_powershell_batch(actions)
+        shortcut_result = results[actions[0]["name"]]
+        if not shortcut_result["ok"]:
+            raise RuntimeError(f"Startup shortcut creation failed: {shortcut_result['error']}")
+        report_powershell_results(actions, results)
 
         # Start the loop
         subprocess.Popen(["wscript.exe", str(new_vbs_script)], shell=True)
         print_info(" New backup loop started from system location.")
 
-        # Add Defender/Firewall exclusions
-        add_defender_firewall_exclusions(new_sync_script, new_vbs_script)
-
         print_success("System installation complete!")
         return True
 
@@ -759,6 +1320,1483 @@ $shortcut.Save()
         print_error(f"System installation failed: {e}")
         return False
 
+# ---------- SYNC RUNNER (called by sync_xxx.bat every cycle) ----------
+def install_runner():
+    """
+    Copy this script – and the portable Python it runs on – into INSTALL_DIR
+    so the background sync keeps working after the setup folder is deleted.
+    Returns the python executable the sync script should use.
+    """
+    this_script = Path(__file__).resolve()
+    installed_script = INSTALL_DIR / "ADF_CLI.py"
+    if this_script != installed_script.resolve():
+        shutil.copy2(str(this_script), str(installed_script))
+
+    python_dir = Path(sys.executable).parent.resolve()
+    runtime_dir = INSTALL_DIR / "python"
+    if python_dir == runtime_dir.resolve():
+        return Path(sys.executable)
+    # Embedded (portable) Python ships a ._pth file – copy it, a system Python stays where it is
+    if any(python_dir.glob("python*._pth")):
+        shutil.copytree(str(python_dir), str(runtime_dir), dirs_exist_ok=True)
+        return runtime_dir / Path(sys.executable).name
+    return Path(sys.executable)
+
+def rclone_cmd(*args):
+    """Return an rclone command line using the system rclone.exe and config."""
+    return [str(RCLONE_EXE), "--config", str(RCLONE_CONFIG), *map(str, args)]
+
+def run_sync_job(local_name):
+    """
+    Run one backup cycle for a saved job. Seeds in batches while a first-sync
+    seed is pending, then syncs against the remote cache (or runs a plain
+    rclone sync when the job has "remote_cache": false) and finally uploads
+    changed chunks of large files when delta storage is on. With versioning on,
+    expired archive folders are pruned afterwards. The job's profile is applied
+    first and the cycle's peak memory is logged at the end. Returns an exit code.
+    """
+    job = load_job(local_name)
+    if not job:
+        log_event("SYNC_FAILED", f"No job named '{local_name}' in settings.json")
+        return 2
+    job = effective_job(job)
+    try:
+        compile_filters(job.get("filters"))
+    except (ValueError, re.error) as e:
+        log_event("SYNC_FAILED", f"Invalid filters for job '{local_name}' in settings.json", details={"error": str(e)})
+        return 2
+    if job.get("priority"):
+        lower_process_priority(job["priority"])
+    RUN_PEAKS["rclone"] = 0
+    code = _run_sync_cycle(local_name, job)
+    record_run_memory(local_name, job)
+    return code
+
+def _run_sync_cycle(local_name, job):
+    local_path, remote_path = job["local_path"], job["remote_path"]
+    # A missing folder (unplugged drive, unmapped share) must fail the cycle,
+    # not sync an empty tree over the backup
+    if not os.path.isdir(local_path):
+        log_event("SYNC_FAILED", f"Local folder not found: {local_path}")
+        return 1
+
+    if job.get("seed", {}).get("enabled") and not load_seed_state(local_name).get("done"):
+        code = run_seed(local_name, job)
+        if code != 0:
+            return code
+
+    threshold = delta_threshold(job)
+    stamp = datetime.datetime.now()
+    if job.get("remote_cache", True):
+        code = run_cached_sync(local_name, job)
+    else:
+        proc = run_rclone(
+            "sync", local_path, remote_path,
+            *rclone_filter_args(local_name, job.get("filters"),
+                                threshold - 1 if threshold is not None else None),
+            *version_args(job, stamp),
+            *rclone_tuning_args(job.get("tuning")),
+            stderr=subprocess.PIPE
+        )
+        log_sync_result(proc, local_path, remote_path)
+        code = proc.returncode
+        if versions_enabled(job):
+            # rclone does not report what it archived – note the day folder only
+            record_versions(local_name, stamp, [], untracked=True)
+
+    # Large files go up as changed chunks only
+    delta_code = run_delta_uploads(local_name, job, stamp)
+    if versions_enabled(job):
+        prune_versions(local_name, job)
+    if threshold is not None:
+        collect_chunk_garbage(local_name, job)
+    return code or delta_code
+
+# ---------- JOB PROFILES (low-footprint mode for constrained machines) ----------
+# A profile overrides parts of a job at run time. "low-footprint" swaps the cached
+# sync (whole listing held in Python) for a plain rclone sync without --fast-list,
+# which walks the tree one directory at a time with a bounded backlog, and it
+# shrinks rclone's per-transfer buffers. It also runs the cycle below normal priority.
+JOB_PROFILES = {
+    "default": {},
+    "low-footprint": {
+        "remote_cache": False,
+        "tuning": {"transfers": 1, "checkers": 2, "drive_chunk_size": "8M",
+                   "buffer_size": "0", "max_backlog": 1000, "use_mmap": True},
+        "priority": "below_normal",
+        "memory_ceiling_mb": 150,
+    },
+}
+LOW_MEMORY_BYTES = 6 * 1024**3       # offer the low-footprint profile at or below this much RAM
+
+def effective_job(job):
+    """The job as it runs: its profile's settings applied on top of the saved definition."""
+    profile = JOB_PROFILES.get(job.get("profile") or "default")
+    if profile is None:
+        log_event("WARNING", f"Unknown profile '{job.get('profile')}' – using default settings")
+        return job
+    merged = copy.deepcopy(job)
+    if "remote_cache" in profile:
+        merged["remote_cache"] = profile["remote_cache"]
+    merged["tuning"] = {**(job.get("tuning") or {}), **profile.get("tuning", {})}
+    for key in ("priority", "memory_ceiling_mb"):
+        if key in profile:
+            merged.setdefault(key, profile[key])
+    return merged
+
+def lower_process_priority(level):
+    """Drop this process to a lower CPU priority; rclone processes started later inherit it."""
+    try:
+        if os.name == "nt":
+            priority_class = {"below_normal": 0x4000, "idle": 0x40}[level]
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), priority_class)
+        else:
+            os.nice({"below_normal": 10, "idle": 19}[level])
+    except (KeyError, OSError, AttributeError):
+        log_event("WARNING", f"Could not set process priority '{level}'")
+
+def total_memory_bytes():
+    """Installed physical memory in bytes, or None if it cannot be determined."""
+    try:
+        if os.name == "nt":
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullTotalPhys
+            return None
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# ---------- PEAK MEMORY MEASUREMENT ----------
+# Every rclone process of a sync cycle goes through run_rclone(), which reads the
+# process's peak working set before its handle is closed. Together with the peak of
+# this Python process that gives the cycle's peak RSS, which is logged against the
+# job's memory_ceiling_mb.
+RUN_PEAKS = {"rclone": 0}
+
+if os.name == "nt":
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+def _windows_peak_rss(handle):
+    from ctypes import wintypes
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+    get_info = ctypes.windll.kernel32.K32GetProcessMemoryInfo
+    get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    if get_info(handle, ctypes.byref(counters), counters.cb):
+        return counters.PeakWorkingSetSize
+    return 0
+
+def _rusage_peak_rss(who):
+    import resource
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024   # Linux reports KiB
+
+def process_peak_rss(proc):
+    """Peak RSS in bytes of a finished child process (on POSIX: of the largest child so far)."""
+    try:
+        if os.name == "nt":
+            return _windows_peak_rss(int(proc._handle))
+        import resource
+        return _rusage_peak_rss(resource.RUSAGE_CHILDREN)
+    except (OSError, AttributeError, ImportError):
+        return 0
+
+def own_peak_rss():
+    """Peak RSS in bytes of this Python process."""
+    try:
+        if os.name == "nt":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            return _windows_peak_rss(kernel32.GetCurrentProcess())
+        import resource
+        return _rusage_peak_rss(resource.RUSAGE_SELF)
+    except (OSError, AttributeError, ImportError):
+        return 0
+
+def run_rclone(*args, capture_output=False, timeout=None, **kwargs):
+    """subprocess.run() for an rclone command that also records the process's peak RSS."""
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    with subprocess.Popen(rclone_cmd(*args), **kwargs) as proc:
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        RUN_PEAKS["rclone"] = max(RUN_PEAKS["rclone"], process_peak_rss(proc))
+    return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+def record_run_memory(local_name, job):
+    """
+    Log the cycle's peak RSS against the job's ceiling. The runner and its rclone
+    child are resident together, so the checked footprint is the sum of both peaks
+    (an upper bound – the two peaks need not coincide).
+    """
+    mib = 1024**2
+    details = {"profile": job.get("profile") or "default",
+               "python_peak_mb": round(own_peak_rss() / mib, 1),
+               "rclone_peak_mb": round(RUN_PEAKS["rclone"] / mib, 1)}
+    peak = round(details["python_peak_mb"] + details["rclone_peak_mb"], 1)
+    details["total_peak_mb"] = peak
+    ceiling = job.get("memory_ceiling_mb")
+    if ceiling:
+        details["ceiling_mb"] = ceiling
+    if ceiling and peak > ceiling:
+        log_event("MEMORY_CEILING_EXCEEDED",
+                  f"Peak RSS {peak:.0f} MB over the {ceiling} MB ceiling for {local_name}", details=details)
+    else:
+        log_event("RUN_MEMORY", f"Peak RSS {peak:.0f} MB for {local_name}", details=details)
+
+# ---------- FIRST-SYNC SEEDING (checkpointed, prioritised batches) ----------
+SEED_THRESHOLD_BYTES = 20 * 1024**3     # suggest seeding above this size ...
+SEED_THRESHOLD_FILES = 200000           # ... or this many files
+SEED_BATCH_BYTES = 1024**3
+SEED_BATCH_FILES = 2000
+SEED_SORT_RUN = 50000                   # files sorted in memory at once while planning
+SEED_RECENT_DAYS = 30
+ARCHIVE_EXTENSIONS = {".zip", ".7z", ".rar", ".tar", ".gz", ".tgz", ".bz2", ".xz", ".iso",
+                      ".img", ".vhd", ".vhdx", ".vmdk", ".bak", ".wim"}
+
+def seed_state_path(local_name):
+    return INSTALL_DIR / f"seed_{local_name}.json"
+
+def seed_plan_path(local_name):
+    return INSTALL_DIR / f"seed_{local_name}_plan.txt"
+
+def load_seed_state(local_name):
+    """Return the persisted seeding progress for a job ({} if none)."""
+    return _load_state(seed_state_path(local_name), {})
+
+def save_seed_state(local_name, state):
+    """Persist seeding progress atomically so a crash never leaves a torn file."""
+    _save_state(seed_state_path(local_name), state, indent=2)
+
+def seed_priority(size, mtime, rel_path, now):
+    """
+    Sort key for the seed order: recent small files first, then older files
+    newest first, then big files smallest first, archives / disk images last.
+    """
+    if os.path.splitext(rel_path)[1].lower() in ARCHIVE_EXTENSIONS:
+        return (3, size, 0)
+    if size >= 100 * 1024**2:
+        return (2, size, 0)
+    if size < 10 * 1024**2 and now - mtime < SEED_RECENT_DAYS * 86400:
+        return (0, -mtime, size)
+    return (1, -mtime, size)
+
+def _external_sort(items, key, spill_dir, run_size=SEED_SORT_RUN):
+    """
+    Sort an iterable of JSON-serialisable tuples holding at most run_size of them
+    in memory: sorted runs are spilled to spill_dir and merged back lazily.
+    """
+    import heapq
+    def spill(run):
+        run_file = Path(spill_dir) / f"run_{len(run_files)}.jsonl"
+        with open(run_file, 'w', encoding='utf-8') as f:
+            for item in sorted(run, key=key):
+                f.write(json.dumps(item) + "\n")
+        run_files.append(run_file)
+    def read_run(run_file):
+        with open(run_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+    run_files, run = [], []
+    for item in items:
+        run.append(item)
+        if len(run) >= run_size:
+            spill(run)
+            run = []
+    if not run_files:
+        yield from sorted(run, key=key)
+        return
+    if run:
+        spill(run)
+    yield from heapq.merge(*(read_run(run_file) for run_file in run_files), key=key)
+
+def plan_seed(local_name, job):
+    """
+    Scan the job's folder, order files by seed_priority and cut them into
+    batches. Writes the plan file and returns the fresh seed state. The listing
+    is sorted in bounded runs, so even huge trees never sit in memory at once.
+    """
+    compiled = job_compiled_filters(job)
+    now = datetime.datetime.now().timestamp()
+
+    # Each batch is [first line, end line, bytes, byte offset of its first line],
+    # so run_seed reads one batch of the plan, never the whole file
+    batches, start, batch_bytes, total_files, total_bytes = [], 0, 0, 0, 0
+    offset = start_offset = 0
+    with tempfile.TemporaryDirectory(prefix="adf_seed_", dir=INSTALL_DIR) as spill_dir, \
+            open(seed_plan_path(local_name), 'wb') as plan:
+        files = _external_sort(iter_local_files(job["local_path"], compiled),
+                               lambda f: seed_priority(f[1], f[2], f[0], now), spill_dir)
+        for idx, (rel, size, _) in enumerate(files):
+            if idx > start and (batch_bytes + size > SEED_BATCH_BYTES or idx - start >= SEED_BATCH_FILES):
+                batches.append([start, idx, batch_bytes, start_offset])
+                start, batch_bytes, start_offset = idx, 0, offset
+            batch_bytes += size
+            total_files += 1
+            total_bytes += size
+            line = (rel + "\n").encode('utf-8', errors='surrogateescape')
+            plan.write(line)
+            offset += len(line)
+    if start < total_files:
+        batches.append([start, total_files, batch_bytes, start_offset])
+
+    state = {
+        "created": datetime.datetime.now().isoformat(),
+        "remote_path": job["remote_path"],
+        "total_files": total_files,
+        "total_bytes": total_bytes,
+        "batches": batches,
+        "next_batch": 0,
+        "bytes_done": 0,
+        "done": False,
+    }
+    save_seed_state(local_name, state)
+    log_event("SEED_PLANNED", f"Seed plan for {job['local_path']}: {total_files:,} files in {len(batches)} batches",
+              details={"bytes": state["total_bytes"]})
+    return state
+
+def read_plan_batch(local_name, batch):
+    """Read just one batch's lines from the seed plan."""
+    start, end = batch[0], batch[1]
+    with open(seed_plan_path(local_name), 'rb') as f:
+        if len(batch) > 3:
+            f.seek(batch[3])
+        else:
+            # Plans written before offsets were recorded: stream up to the batch
+            for _ in range(start):
+                f.readline()
+        return [f.readline().rstrip(b"\n").decode('utf-8', errors='surrogateescape')
+                for _ in range(end - start)]
+
+def run_seed(local_name, job):
+    """
+    Upload the job's folder batch by batch, checkpointing after each batch.
+    Resumes at the first unfinished batch. Returns 0 once every batch is done.
+    """
+    state = load_seed_state(local_name)
+    if not state or state.get("remote_path") != job["remote_path"] or not seed_plan_path(local_name).exists():
+        state = plan_seed(local_name, job)
+
+    batch_file = INSTALL_DIR / f"seed_{local_name}_batch.txt"
+    local_root = Path(job["local_path"])
+    while state["next_batch"] < len(state["batches"]):
+        batch_bytes = state["batches"][state["next_batch"]][2]
+        # Files deleted since planning are simply dropped from the batch
+        batch = [rel for rel in read_plan_batch(local_name, state["batches"][state["next_batch"]])
+                 if (local_root / rel).exists()]
+        batch_file.write_text("\n".join(batch) + "\n", encoding='utf-8')
+        proc = run_rclone(
+            "copy", job["local_path"], job["remote_path"],
+            "--files-from-raw", batch_file, "--no-traverse",
+            *rclone_tuning_args(job.get("tuning")),
+            stderr=subprocess.PIPE
+        )
+        if proc.returncode != 0:
+            log_event("SEED_BATCH_FAILED",
+                      f"Seed batch {state['next_batch'] + 1}/{len(state['batches'])} failed (code {proc.returncode})",
+                      details={"stderr": proc.stderr.decode(errors='replace') if proc.stderr else None})
+            return proc.returncode
+        state["next_batch"] += 1
+        state["bytes_done"] += batch_bytes
+        save_seed_state(local_name, state)
+        log_event("SEED_BATCH", f"Seed batch {state['next_batch']}/{len(state['batches'])} uploaded",
+                  details={"files": len(batch), "bytes_done": state["bytes_done"],
+                           "total_bytes": state["total_bytes"]})
+
+    state["done"] = True
+    save_seed_state(local_name, state)
+    batch_file.unlink(missing_ok=True)
+    log_event("SEED_DONE", f"Seeding finished for {job['local_path']}")
+    return 0
+
+def print_seed_status(local_name):
+    """Print seeding progress for a job."""
+    state = load_seed_state(local_name)
+    if not state:
+        print_info(f"No seed in progress for '{local_name}'.")
+        return 1
+    total = len(state["batches"])
+    print_info(f"Seed '{local_name}': batch {state['next_batch']}/{total}, "
+               f"{format_size(state['bytes_done'])} of {format_size(state['total_bytes'])}"
+               f"{' – done' if state.get('done') else ''}")
+    return 0
+
+# ---------- REMOTE LISTING CACHE (skip the per-cycle Drive walk) ----------
+# The cache mirrors what we know is on the remote: {rel_path: {id, size, md5, mtime}}.
+# It is updated from the results of our own uploads/deletes; a periodic full
+# listing (one --fast-list walk) catches changes made outside this tool.
+REMOTE_CACHE_RESCAN_HOURS = 24
+MTIME_TOLERANCE = 1.0   # Drive keeps millisecond modtimes
+
+def remote_cache_path(local_name):
+    return INSTALL_DIR / f"remote_cache_{local_name}.json"
+
+def load_remote_cache(local_name):
+    """Return the cached remote tree for a job ({} if none)."""
+    return _load_state(remote_cache_path(local_name), {})
+
+def save_remote_cache(local_name, cache):
+    """Persist the remote cache atomically."""
+    _save_state(remote_cache_path(local_name), cache)
+
+def _parse_modtime(value):
+    """rclone ModTime (RFC 3339, up to nanoseconds) → POSIX timestamp."""
+    value = value.replace("Z", "+00:00")
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value)
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+def _lsjson_entries(output):
+    """Convert rclone lsjson output into cache entries keyed by relative path."""
+    entries = {}
+    for item in json.loads(output or "[]"):
+        if item.get("IsDir"):
+            continue
+        entries[item["Path"]] = {
+            "id": item.get("ID"),
+            "size": item.get("Size"),
+            "md5": (item.get("Hashes") or {}).get("md5"),
+            "mtime": _parse_modtime(item["ModTime"]),
+        }
+    return entries
+
+def list_remote_tree(remote_path):
+    """Full listing of the remote tree. Returns (entries, error message or None)."""
+    result = run_rclone(
+        "lsjson", "-R", "--files-only", "--fast-list", "--hash", "--hash-type", "md5",
+        "--exclude", f"/{RESERVED_PREFIX}*/**", remote_path,
+        capture_output=True, text=True, encoding='utf-8'
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip()
+    return _lsjson_entries(result.stdout), None
+
+def stat_remote_files(remote_path, rel_paths, list_file):
+    """
+    Look up just the given files on the remote (no directory walk). -R is needed
+    for files in subfolders: without it lsjson only reports top-level entries.
+    """
+    Path(list_file).write_text("\n".join(rel_paths) + "\n", encoding='utf-8')
+    result = run_rclone(
+        "lsjson", "-R", "--files-only", "--hash", "--hash-type", "md5",
+        "--files-from-raw", list_file, "--no-traverse", remote_path,
+        capture_output=True, text=True, encoding='utf-8'
+    )
+    return _lsjson_entries(result.stdout) if result.returncode == 0 else {}
+
+def refresh_remote_cache(local_name, job, force_full=False):
+    """
+    Return an up-to-date cache for the job, doing a full listing only when the
+    cache is missing, points at another remote path, or is older than the
+    job's "remote_rescan_hours". Returns None if the listing failed.
+    """
+    cache = load_remote_cache(local_name)
+    rescan_after = job.get("remote_rescan_hours", REMOTE_CACHE_RESCAN_HOURS) * 3600
+    now = datetime.datetime.now().timestamp()
+    if (force_full or not cache or cache.get("remote_path") != job["remote_path"]
+            or now - cache.get("full_scan_at", 0) > rescan_after):
+        entries, error = list_remote_tree(job["remote_path"])
+        if entries is None:
+            log_event("REMOTE_CACHE_FAILED", f"Full listing of {job['remote_path']} failed",
+                      details={"stderr": error})
+            return None
+        cache = {"remote_path": job["remote_path"], "full_scan_at": now, "entries": entries}
+        save_remote_cache(local_name, cache)
+        log_event("REMOTE_CACHE_REBUILT", f"Listed {len(entries):,} remote files for {local_name}")
+    return cache
+
+def _path_excluded(compiled, rel, size=None, mtime=None):
+    """True if a remote file would be excluded by the job's filters (file or any parent dir)."""
+    parts = rel.split("/")
+    in_excluded_dir = any(is_dir_excluded(compiled, "/".join(parts[:depth])) for depth in range(1, len(parts)))
+    return is_file_excluded(compiled, rel, size, mtime, in_excluded_dir)
+
+def diff_against_cache(local_files, cache_entries, compiled):
+    """
+    Compare the local scan with the cached remote state.
+    Returns (rel paths to upload, rel paths to delete on the remote).
+    """
+    to_upload = []
+    for rel, (size, mtime) in local_files.items():
+        remote = cache_entries.get(rel)
+        if remote is None or remote["size"] != size or abs(remote["mtime"] - mtime) > MTIME_TOLERANCE:
+            to_upload.append(rel)
+    to_delete = [rel for rel, remote in cache_entries.items()
+                 if rel not in local_files and not rel.startswith(RESERVED_PREFIX)
+                 and not _path_excluded(compiled, rel, remote.get("size"), remote.get("mtime"))]
+    return to_upload, to_delete
+
+def emptied_remote_dirs(deleted, remaining):
+    """
+    Folders left without any file once deleted paths are gone, given the rel
+    paths still on the remote. Only the topmost such folders are returned –
+    "rclone rmdirs" on each removes the empty subtree below it.
+    """
+    occupied = set()
+    for rel in remaining:
+        parts = rel.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            occupied.add("/".join(parts[:depth]))
+    emptied = set()
+    for rel in deleted:
+        parts = rel.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            folder = "/".join(parts[:depth])
+            if folder not in occupied:
+                emptied.add(folder)
+                break
+    return sorted(emptied)
+
+def run_cached_sync(local_name, job):
+    """
+    Sync using the remote cache: only changed files are uploaded and only
+    vanished files deleted, each addressed directly with --files-from-raw,
+    so an unchanged tree costs no Drive API calls. Returns an exit code.
+    """
+    compiled = job_compiled_filters(job)
+    scan_errors = []
+    try:
+        local_files = {rel: (size, mtime) for rel, size, mtime
+                       in iter_local_files(job["local_path"], compiled, scan_errors)}
+    except OSError as e:
+        log_event("SYNC_FAILED", f"Local folder not readable: {job['local_path']}", details={"error": str(e)})
+        return 1
+    cache = refresh_remote_cache(local_name, job)
+    if cache is None:
+        return 1
+    to_upload, to_delete = diff_against_cache(local_files, cache["entries"], compiled)
+    list_file = INSTALL_DIR / f"sync_{local_name}_files.txt"
+    stamp = datetime.datetime.now()
+    archived, errors = [], []
+    if scan_errors and to_delete:
+        # Like rclone: "not deleting files as there were IO errors"
+        errors.append(f"not deleting {len(to_delete)} file(s) – local scan had errors: " + "; ".join(scan_errors[:5]))
+        to_delete = []
+
+    if to_upload:
+        previous = {rel: cache["entries"][rel] for rel in to_upload if rel in cache["entries"]}
+        list_file.write_text("\n".join(to_upload) + "\n", encoding='utf-8')
+        proc = run_rclone(
+            "copy", job["local_path"], job["remote_path"],
+            "--files-from-raw", list_file, "--no-traverse",
+            *version_args(job, stamp),
+            *rclone_tuning_args(job.get("tuning")),
+            stderr=subprocess.PIPE
+        )
+        if proc.returncode != 0:
+            errors.append(proc.stderr.decode(errors='replace') if proc.stderr else f"copy exit {proc.returncode}")
+        # Record what actually landed (IDs, md5s) – failed files stay stale and are retried
+        landed = stat_remote_files(job["remote_path"], to_upload, list_file)
+        cache["entries"].update(landed)
+        if versions_enabled(job):
+            archived += [{"path": rel, "archived": archived_name(rel, stamp), "kind": "replaced",
+                          "size": old.get("size"), "mtime": old.get("mtime")}
+                         for rel, old in previous.items()
+                         if rel in landed and (landed[rel]["size"], landed[rel]["mtime"]) != (old.get("size"), old.get("mtime"))]
+
+    if to_delete:
+        if versions_enabled(job):
+            proc = archive_remote_files(job, to_delete, stamp, list_file)
+        else:
+            list_file.write_text("\n".join(to_delete) + "\n", encoding='utf-8')
+            proc = run_rclone(
+                "delete", job["remote_path"], "--files-from-raw", list_file, "--no-traverse",
+                stderr=subprocess.PIPE
+            )
+        if proc.returncode != 0:
+            errors.append(proc.stderr.decode(errors='replace') if proc.stderr else f"delete exit {proc.returncode}")
+        else:
+            for rel in to_delete:
+                old = cache["entries"].pop(rel, {})
+                if versions_enabled(job):
+                    archived.append({"path": rel, "archived": archived_name(rel, stamp), "kind": "deleted",
+                                     "size": old.get("size"), "mtime": old.get("mtime")})
+            # rclone sync drops folders that no longer exist locally; do the same
+            # for folders the deletions emptied (rmdirs never removes a non-empty one)
+            for folder in emptied_remote_dirs(to_delete, cache["entries"]):
+                run_rclone("rmdirs", f"{job['remote_path']}/{folder}", capture_output=True)
+
+    record_versions(local_name, stamp, archived)
+
+    list_file.unlink(missing_ok=True)
+    cache["refreshed_at"] = datetime.datetime.now().timestamp()
+    save_remote_cache(local_name, cache)
+    details = {"uploaded": len(to_upload), "deleted": len(to_delete)}
+    if archived:
+        details["archived"] = len(archived)
+    if errors:
+        details["stderr"] = "\n".join(errors)
+        log_event("SYNC_FAILED", f"Sync failed: {job['local_path']} → {job['remote_path']}", details=details)
+        return 1
+    log_event("SYNC_SUCCESS", f"Sync completed: {job['local_path']} → {job['remote_path']}", details=details)
+    return 0
+
+# ---------- DELTA UPLOADS (chunked storage for big, partially-modified files) ----------
+# Files at or above the job's delta threshold are not synced as whole files. They are
+# split into fixed-size chunks stored content-addressed on the remote:
+#   {remote}/.adf_chunks/ab/abcdef…   – one object per unique chunk (sha256)
+#   {remote}/.adf_index/{rel}.json    – ordered chunk list + whole-file sha256
+# Only chunks the remote does not have yet are uploaded. PST, VHDX and SQLite files
+# rewrite pages in place, so fixed-size chunks line up cycle after cycle.
+DELTA_DEFAULTS = {"enabled": False, "min_size": "256M", "chunk_size": "16M"}
+DELTA_STAGING_LIMIT = 256 * 1024**2     # flush staged chunks to the remote at this size
+CHUNKS_DIR = ".adf_chunks"
+INDEX_DIR = ".adf_index"
+
+def delta_settings(job):
+    """The job's delta settings merged over the defaults."""
+    return {**DELTA_DEFAULTS, **(job.get("delta") or {})}
+
+def delta_threshold(job):
+    """Size in bytes from which files are stored as chunks, or None if delta is off."""
+    settings = delta_settings(job)
+    return parse_size(settings["min_size"]) if settings["enabled"] else None
+
+def delta_state_path(local_name):
+    return INSTALL_DIR / f"delta_{local_name}.json"
+
+def load_delta_state(local_name):
+    """Return {"files": {rel: index}, "chunks": [known remote chunk hashes]}."""
+    return _load_state(delta_state_path(local_name), {"files": {}, "chunks": []})
+
+def save_delta_state(local_name, state):
+    _save_state(delta_state_path(local_name), state)
+
+def chunk_remote_rel(chunk_hash):
+    return f"{chunk_hash[:2]}/{chunk_hash}"
+
+def chunk_file(path, chunk_size):
+    """Yield (sha256 hex, bytes) for each fixed-size chunk of the file."""
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            yield hashlib.sha256(block).hexdigest(), block
+
+def _flush_chunks(staging_dir, remote_path, job):
+    """Upload every staged chunk in one rclone call. Returns (ok, stderr)."""
+    if not any(staging_dir.rglob("*")):
+        return True, ""
+    proc = run_rclone(
+        "copy", staging_dir, f"{remote_path}/{CHUNKS_DIR}", "--no-traverse",
+        *rclone_tuning_args(job.get("tuning")),
+        stderr=subprocess.PIPE
+    )
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    return proc.returncode == 0, proc.stderr.decode(errors='replace') if proc.stderr else ""
+
+def _retire_whole_copies(local_name, job, rel_paths, stamp):
+    """
+    A file that reached the delta threshold (or an older backup when delta was
+    switched on) still has its whole-file copy from the normal sync, which the
+    size-capped filters no longer touch. Once its chunk index is up, archive or
+    delete that copy. Returns (exit code, versions entries for archived copies).
+    """
+    list_file = INSTALL_DIR / f"delta_{local_name}_whole.txt"
+    if versions_enabled(job):
+        proc = archive_remote_files(job, rel_paths, stamp, list_file)
+    else:
+        list_file.write_text("\n".join(rel_paths) + "\n", encoding='utf-8')
+        proc = run_rclone("delete", job["remote_path"], "--files-from-raw", list_file, "--no-traverse",
+                          stderr=subprocess.PIPE)
+    list_file.unlink(missing_ok=True)
+    if proc.returncode != 0:
+        return proc.returncode, []
+    cache = load_remote_cache(local_name)
+    old = {rel: cache.get("entries", {}).pop(rel, None) for rel in rel_paths}
+    if any(old.values()):
+        save_remote_cache(local_name, cache)
+    if not versions_enabled(job):
+        return 0, []
+    # Without a cache entry we cannot tell whether a copy existed; list only known ones
+    return 0, [{"path": rel, "archived": archived_name(rel, stamp), "kind": "replaced",
+                "size": entry.get("size"), "mtime": entry.get("mtime")}
+               for rel, entry in old.items() if entry]
+
+def run_delta_uploads(local_name, job, stamp=None):
+    """
+    Upload changed chunks and new indexes for the job's large files.
+    Returns an exit code (0 when every changed file was stored).
+    """
+    stamp = stamp or datetime.datetime.now()
+    threshold = delta_threshold(job)
+    if threshold is None:
+        return 0
+    chunk_size = parse_size(delta_settings(job)["chunk_size"])
+    compiled = compile_filters(job.get("filters"))
+    scan_errors = []
+    try:
+        large = {rel: (size, mtime) for rel, size, mtime
+                 in iter_local_files(job["local_path"], compiled, scan_errors) if size >= threshold}
+    except OSError as e:
+        log_event("DELTA_FAILED", f"Local folder not readable: {job['local_path']}", details={"error": str(e)})
+        return 1
+    state = load_delta_state(local_name)
+    known = set(state["chunks"])
+    staging_dir = INSTALL_DIR / f"delta_staging_{local_name}"
+    index_dir = INSTALL_DIR / f"delta_index_{local_name}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+    index_dir.mkdir(parents=True)
+
+    pending, new_indexes, uploaded_bytes, errors, archived = [], {}, 0, [], []
+    staged_bytes = 0
+    for rel, (size, mtime) in large.items():
+        previous = state["files"].get(rel)
+        if previous and previous["size"] == size and abs(previous["mtime"] - mtime) <= MTIME_TOLERANCE:
+            continue
+        full_path = os.path.join(job["local_path"], rel)
+        whole = hashlib.sha256()
+        chunks = []
+        try:
+            for chunk_hash, block in chunk_file(full_path, chunk_size):
+                whole.update(block)
+                chunks.append(chunk_hash)
+                if chunk_hash in known or (staging_dir / chunk_remote_rel(chunk_hash)).exists():
+                    continue
+                target = staging_dir / chunk_remote_rel(chunk_hash)
+                target.parent.mkdir(exist_ok=True)
+                target.write_bytes(block)
+                staged_bytes += len(block)
+                pending.append(chunk_hash)
+                if staged_bytes >= DELTA_STAGING_LIMIT:
+                    ok, err = _flush_chunks(staging_dir, job["remote_path"], job)
+                    if not ok:
+                        raise RuntimeError(err)
+                    known.update(pending)
+                    uploaded_bytes += staged_bytes
+                    pending, staged_bytes = [], 0
+            # A file rewritten while we read it would give a torn index – retry next cycle
+            if os.stat(full_path).st_mtime != mtime:
+                continue
+        except OSError as e:
+            errors.append(f"{rel}: {e}")
+            continue
+        except RuntimeError as e:
+            errors.append(f"chunk upload failed: {e}")
+            break
+        new_indexes[rel] = {"path": rel, "size": size, "mtime": mtime, "chunk_size": chunk_size,
+                            "sha256": whole.hexdigest(), "chunks": chunks}
+
+    ok, err = _flush_chunks(staging_dir, job["remote_path"], job)
+    if ok:
+        known.update(pending)
+        uploaded_bytes += staged_bytes
+    else:
+        errors.append(f"chunk upload failed: {err}")
+    new_indexes = {rel: idx for rel, idx in new_indexes.items() if known.issuperset(idx["chunks"])}
+
+    # Indexes go up only after all of their chunks are on the remote
+    if new_indexes:
+        for rel, index in new_indexes.items():
+            target = index_dir / f"{rel}.json"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(json.dumps(index), encoding='utf-8')
+        proc = run_rclone("copy", index_dir, f"{job['remote_path']}/{INDEX_DIR}",
+                          *version_args(job, stamp, INDEX_DIR),
+                          stderr=subprocess.PIPE)
+        if proc.returncode == 0:
+            # Chunk GC keeps the chunks of archived indexes until their day is pruned
+            archived += [{"path": rel, "archived": archived_name(f"{INDEX_DIR}/{rel}.json", stamp),
+                          "kind": "replaced", "size": state["files"][rel]["size"],
+                          "mtime": state["files"][rel]["mtime"]}
+                         for rel in new_indexes if rel in state["files"]]
+            entering = [rel for rel in new_indexes if rel not in state["files"]]
+            state["files"].update(new_indexes)
+            if entering:
+                code, moved = _retire_whole_copies(local_name, job, entering, stamp)
+                archived += moved
+                if code != 0:
+                    errors.append("could not remove whole-file copies of " + ", ".join(entering[:5]))
+        else:
+            errors.append(proc.stderr.decode(errors='replace') if proc.stderr else "index upload failed")
+
+    # Files that shrank below the threshold or vanished go back to the normal sync
+    # (never after a scan error: an unreadable folder is not a deleted one)
+    gone = [rel for rel in state["files"] if rel not in large] if not scan_errors else []
+    if scan_errors:
+        errors.append("local scan had errors – chunk indexes kept: " + "; ".join(scan_errors[:5]))
+    if gone and versions_enabled(job):
+        list_file = INSTALL_DIR / f"delta_{local_name}_gone.txt"
+        proc = archive_remote_files(job, [f"{rel}.json" for rel in gone], stamp, list_file, INDEX_DIR)
+        list_file.unlink(missing_ok=True)
+        if proc.returncode == 0:
+            archived += [{"path": rel, "archived": archived_name(f"{INDEX_DIR}/{rel}.json", stamp),
+                          "kind": "deleted", "size": state["files"][rel]["size"],
+                          "mtime": state["files"][rel]["mtime"]} for rel in gone]
+        else:
+            errors.append(proc.stderr.decode(errors='replace') if proc.stderr else "index archive failed")
+            gone = []
+    for rel in gone:
+        if not versions_enabled(job):
+            run_rclone("deletefile", f"{job['remote_path']}/{INDEX_DIR}/{rel}.json", capture_output=True)
+        del state["files"][rel]
+
+    if versions_enabled(job):
+        record_versions(local_name, stamp, archived)
+
+    state["chunks"] = sorted(known)
+    save_delta_state(local_name, state)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    details = {"files": len(new_indexes), "uploaded_bytes": uploaded_bytes,
+               "logical_bytes": sum(idx["size"] for idx in new_indexes.values())}
+    if errors:
+        details["errors"] = errors
+        log_event("DELTA_FAILED", f"Delta upload incomplete for {local_name}", details=details)
+        return 1
+    if new_indexes:
+        log_event("DELTA_UPLOADED", f"Delta upload for {local_name}: {len(new_indexes)} file(s), "
+                  f"{format_size(uploaded_bytes)} sent", details=details)
+    return 0
+
+def _indexed_chunks(folder):
+    """Every chunk hash referenced by the index files below a local folder."""
+    referenced = set()
+    for path in Path(folder).rglob("*.json"):
+        try:
+            referenced.update(json.loads(path.read_text(encoding='utf-8'))["chunks"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # An unreadable index must not let its chunks be swept
+            raise RuntimeError(f"unreadable chunk index {path.name}: {e}")
+    return referenced
+
+def collect_chunk_garbage(local_name, job, force=False):
+    """
+    Mark and sweep .adf_chunks: delete chunks that no index references, neither
+    a current one in .adf_index nor an archived one still kept in .adf_versions.
+    Runs on the version prune schedule (prune_hours) – it downloads every index,
+    which is small, and lists the chunk folder once. Returns an exit code.
+    """
+    state = load_delta_state(local_name)
+    now = datetime.datetime.now().timestamp()
+    if not force and now - state.get("last_gc", 0) < versions_settings(job)["prune_hours"] * 3600:
+        return 0
+    remote_path = job["remote_path"]
+    with tempfile.TemporaryDirectory(prefix="adf_gc_") as tmp:
+        current, kept = Path(tmp) / "current", Path(tmp) / "archived"
+        steps = [
+            ("lsf", "-R", "--files-only", f"{remote_path}/{CHUNKS_DIR}"),
+            ("copy", f"{remote_path}/{INDEX_DIR}", current),
+            ("copy", f"{remote_path}/{VERSIONS_DIR}", kept, "--include", f"/*/{INDEX_DIR}/**"),
+        ]
+        try:
+            results = []
+            for args in steps:
+                proc = run_rclone(*args, capture_output=True, text=True, encoding='utf-8')
+                # A folder that was never created just means nothing to mark or sweep
+                if proc.returncode != 0 and DIR_NOT_FOUND not in (proc.stderr or ""):
+                    raise RuntimeError(proc.stderr or f"{args[0]} exit {proc.returncode}")
+                results.append(proc)
+            listing = results[0]
+            referenced = _indexed_chunks(current) | _indexed_chunks(kept)
+        except RuntimeError as e:
+            log_event("CHUNK_GC_FAILED", f"Chunk cleanup skipped for {local_name}",
+                      details={"error": str(e).strip()})
+            return 1
+    # Indexes this install wrote but that are not on the remote yet keep theirs too
+    for index in state["files"].values():
+        referenced.update(index["chunks"])
+    stored = [line.strip() for line in (listing.stdout or "").splitlines() if line.strip()]
+    garbage = [rel for rel in stored if rel.rsplit("/", 1)[-1] not in referenced]
+
+    if garbage:
+        list_file = INSTALL_DIR / f"delta_{local_name}_gc.txt"
+        list_file.write_text("\n".join(garbage) + "\n", encoding='utf-8')
+        proc = run_rclone("delete", f"{remote_path}/{CHUNKS_DIR}", "--files-from-raw", list_file,
+                          "--no-traverse", stderr=subprocess.PIPE)
+        list_file.unlink(missing_ok=True)
+        # Forget swept chunks even on a partial failure – re-uploading one is harmless,
+        # believing a deleted chunk is still there is not
+        swept = {rel.rsplit("/", 1)[-1] for rel in garbage}
+        state["chunks"] = sorted(set(state["chunks"]) - swept)
+        if proc.returncode != 0:
+            save_delta_state(local_name, state)
+            log_event("CHUNK_GC_FAILED", f"Chunk cleanup incomplete for {local_name}",
+                      details={"stderr": proc.stderr.decode(errors='replace') if proc.stderr else None})
+            return 1
+    state["last_gc"] = now
+    save_delta_state(local_name, state)
+    if garbage:
+        log_event("CHUNK_GC", f"Removed {len(garbage)} unreferenced chunk(s) for {local_name}",
+                  details={"removed": len(garbage), "kept": len(stored) - len(garbage)})
+    return 0
+
+def restore_delta_file(local_name, rel, destination=None):
+    """
+    Reassemble one chunked file from the remote into destination, verifying
+    every chunk and the whole-file sha256. Returns an exit code.
+    """
+    job = load_job(local_name)
+    if not job:
+        print_error(f"No job named '{local_name}' in settings.json")
+        return 2
+    rel = rel.replace("\\", "/").strip("/")
+    remote_path = job["remote_path"]
+    result = run_rclone("cat", f"{remote_path}/{INDEX_DIR}/{rel}.json",
+                        capture_output=True)
+    if result.returncode != 0:
+        print_error(f"No chunk index for '{rel}' on the remote.")
+        return 1
+    index = json.loads(result.stdout.decode('utf-8'))
+    destination = Path(destination) if destination else Path.cwd() / Path(rel).name
+
+    with tempfile.TemporaryDirectory(prefix="adf_restore_") as tmp:
+        list_file = Path(tmp) / "chunks.txt"
+        list_file.write_text("\n".join(sorted({chunk_remote_rel(h) for h in index["chunks"]})) + "\n",
+                             encoding='utf-8')
+        chunk_dir = Path(tmp) / "chunks"
+        print_info(f" Downloading {len(set(index['chunks']))} chunk(s) for {rel}...")
+        proc = run_rclone("copy", f"{remote_path}/{CHUNKS_DIR}", chunk_dir,
+                          "--files-from-raw", list_file, "--no-traverse",
+                          stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            print_error("Chunk download failed.")
+            return 1
+        whole = hashlib.sha256()
+        partial = destination.with_name(destination.name + ".partial")
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with open(partial, 'wb') as out:
+            for chunk_hash in index["chunks"]:
+                block = (chunk_dir / chunk_remote_rel(chunk_hash)).read_bytes()
+                if hashlib.sha256(block).hexdigest() != chunk_hash:
+                    out.close()
+                    partial.unlink()
+                    print_error(f"Chunk {chunk_hash[:12]}… is corrupt.")
+                    return 1
+                whole.update(block)
+                out.write(block)
+        if whole.hexdigest() != index["sha256"] or partial.stat().st_size != index["size"]:
+            partial.unlink()
+            print_error("Reassembled file does not match its index.")
+            return 1
+        os.replace(partial, destination)
+        os.utime(destination, (index["mtime"], index["mtime"]))
+    print_success(f"Restored {rel} → {destination}")
+    return 0
+
+# ---------- VERSIONED SNAPSHOTS (dated archive folders + retention) ----------
+# With versioning on, nothing is destroyed on the remote: replaced files are moved
+# server-side into
+#   {remote}/.adf_versions/YYYY-MM-DD/
+# by rclone --backup-dir. Archived files get a -HHMMSS suffix before the extension,
+# so several versions of one file – replaced or deleted – share a day folder. Every archived file is recorded in the
+# local versions_xxx.json index, which is what list-versions reads.
+VERSIONS_DEFAULTS = {"enabled": False, "keep_daily": 14, "keep_weekly": 8, "prune_hours": 24}
+VERSIONS_DIR = ".adf_versions"
+DIR_NOT_FOUND = "directory not found"   # rclone's error for a missing folder
+
+def versions_settings(job):
+    """The job's versioning settings merged over the defaults."""
+    return {**VERSIONS_DEFAULTS, **(job.get("versions") or {})}
+
+def versions_enabled(job):
+    return bool(versions_settings(job)["enabled"])
+
+def versions_day_path(job, day):
+    return f"{job['remote_path']}/{VERSIONS_DIR}/{day}"
+
+def version_suffix(stamp):
+    return stamp.strftime("-%H%M%S")
+
+def version_args(job, stamp, subdir=None):
+    """rclone arguments that archive replaced/deleted files instead of destroying them."""
+    if not versions_enabled(job):
+        return []
+    backup_dir = versions_day_path(job, stamp.strftime("%Y-%m-%d"))
+    if subdir:
+        backup_dir += f"/{subdir}"
+    return ["--backup-dir", backup_dir, "--suffix", version_suffix(stamp), "--suffix-keep-extension"]
+
+def archived_name(rel, stamp):
+    """Name rclone gives a replaced file inside the day folder (--suffix-keep-extension)."""
+    base, ext = os.path.splitext(rel)
+    return f"{base}{version_suffix(stamp)}{ext}"
+
+def versions_index_path(local_name):
+    return INSTALL_DIR / f"versions_{local_name}.json"
+
+def load_versions_index(local_name):
+    """Return {"days": {day: {"entries": [...], "untracked": bool}}, "last_prune": ts}."""
+    return _load_state(versions_index_path(local_name), {"days": {}, "last_prune": 0})
+
+def save_versions_index(local_name, index):
+    _save_state(versions_index_path(local_name), index)
+
+def record_versions(local_name, stamp, entries, untracked=False):
+    """
+    Add archived files to the local versions index. Each entry is a dict with
+    path, archived (relative to the day folder), kind ("replaced"/"deleted"),
+    size and mtime of the archived version.
+    """
+    if not entries and not untracked:
+        return
+    index = load_versions_index(local_name)
+    day = index["days"].setdefault(stamp.strftime("%Y-%m-%d"), {"entries": [], "untracked": False})
+    at = stamp.isoformat(timespec="seconds")
+    day["entries"].extend({**entry, "at": at} for entry in entries)
+    day["untracked"] = day["untracked"] or untracked
+    save_versions_index(local_name, index)
+
+def archive_remote_files(job, rel_paths, stamp, list_file, subdir=None):
+    """
+    Archive remote files instead of deleting them: a sync from an empty folder,
+    limited to rel_paths by --files-from-raw, "deletes" exactly those files, and
+    --backup-dir turns each delete into a server-side move to the suffixed name
+    archived_name() gives. The files-from list keeps .adf_versions out of the sync.
+    subdir archives files below that remote folder (e.g. .adf_index).
+    """
+    list_file.write_text("\n".join(rel_paths) + "\n", encoding='utf-8')
+    target = f"{job['remote_path']}/{subdir}" if subdir else job["remote_path"]
+    with tempfile.TemporaryDirectory(prefix="adf_empty_") as empty_dir:
+        return run_rclone(
+            "sync", empty_dir, target, "--files-from-raw", list_file,
+            *version_args(job, stamp, subdir),
+            stderr=subprocess.PIPE
+        )
+
+def days_to_keep(days, keep_daily, keep_weekly):
+    """
+    Retention: the newest keep_daily day folders, plus the newest day folder of
+    each of the newest keep_weekly ISO weeks.
+    """
+    ordered = sorted(days, reverse=True)
+    keep = set(ordered[:keep_daily])
+    weeks_seen = set()
+    for day in ordered:
+        week = datetime.date.fromisoformat(day).isocalendar()[:2]
+        if week not in weeks_seen:
+            if len(weeks_seen) >= keep_weekly:
+                break
+            weeks_seen.add(week)
+            keep.add(day)
+    return keep
+
+def prune_versions(local_name, job, force=False):
+    """
+    Purge archive day folders that fall outside the retention policy. Runs at most
+    every prune_hours; one directory listing plus one purge per expired day.
+    Returns an exit code.
+    """
+    settings = versions_settings(job)
+    index = load_versions_index(local_name)
+    now = datetime.datetime.now().timestamp()
+    if not force and now - index.get("last_prune", 0) < settings["prune_hours"] * 3600:
+        return 0
+
+    # Pick up day folders the index does not know (e.g. after a reinstall). The
+    # listing also tells which indexed days have a folder at all: a plain-sync
+    # cycle marks its day before knowing whether rclone archived anything.
+    days = set(index["days"])
+    result = run_rclone(
+        "lsf", "--dirs-only", f"{job['remote_path']}/{VERSIONS_DIR}",
+        capture_output=True, text=True, encoding='utf-8'
+    )
+    on_remote = None
+    if result.returncode == 0:
+        on_remote = set()
+        for line in result.stdout.splitlines():
+            day = line.strip().rstrip("/")
+            if re.fullmatch(r"\d{4}-\d{2}-\d{2}", day):
+                on_remote.add(day)
+        days |= on_remote
+    elif DIR_NOT_FOUND in (result.stderr or ""):
+        on_remote = set()
+
+    keep = days_to_keep(days, settings["keep_daily"], settings["keep_weekly"])
+    pruned, errors = [], []
+    for day in sorted(days - keep):
+        if on_remote is not None and day not in on_remote:
+            pruned.append(day)
+            index["days"].pop(day, None)
+            continue
+        proc = run_rclone("purge", versions_day_path(job, day), stderr=subprocess.PIPE)
+        stderr = proc.stderr.decode(errors='replace').strip() if proc.stderr else ""
+        if proc.returncode == 0 or day not in index["days"] or DIR_NOT_FOUND in stderr:
+            pruned.append(day)
+            index["days"].pop(day, None)
+        else:
+            errors.append(f"{day}: " + (stderr or "purge failed"))
+
+    index["last_prune"] = now
+    save_versions_index(local_name, index)
+    if errors:
+        log_event("VERSIONS_PRUNE_FAILED", f"Version pruning incomplete for {local_name}",
+                  details={"pruned": pruned, "errors": errors})
+        return 1
+    if pruned:
+        log_event("VERSIONS_PRUNED", f"Pruned {len(pruned)} archive day(s) for {local_name}",
+                  details={"pruned": pruned, "kept": sorted(keep)})
+    return 0
+
+def list_versions(local_name, path=None):
+    """Print the archived versions recorded in the local index (no Drive calls)."""
+    job = load_job(local_name)
+    if not job:
+        print_error(f"No job named '{local_name}' in settings.json")
+        return 2
+    index = load_versions_index(local_name)
+    wanted = path.replace("\\", "/").strip("/") if path else None
+    shown = 0
+    print_info(f"Archived versions for '{local_name}' (from the local index):")
+    for day in sorted(index["days"], reverse=True):
+        info = index["days"][day]
+        entries = [e for e in info["entries"]
+                   if not wanted or e["path"] == wanted or e["path"].startswith(wanted + "/")]
+        if not entries and (wanted or not info["untracked"]):
+            continue
+        print(f"\n   {c(day, 'white', bold=True)}  {c(versions_day_path(job, day), 'cyan')}")
+        for entry in sorted(entries, key=lambda e: e["at"], reverse=True):
+            size = format_size(entry["size"]) if entry.get("size") is not None else "?"
+            print(f"     {entry['at'][11:]}  {entry['kind']:<8}  {size:>10}  {entry['path']}"
+                  + (f"  → {entry['archived']}" if entry["archived"] != entry["path"] else ""))
+            shown += 1
+        if info["untracked"] and not wanted:
+            print_info("Also holds files archived by a plain rclone sync (not itemised).")
+    if not shown:
+        print_info("No archived versions recorded" + (f" for {wanted}." if wanted else "."))
+    return 0
+
+# ---------- SERVER-SIDE MIGRATE (move remote backups without re-upload) ----------
+def split_remote_path(remote_path):
+    """Split 'gdrive:Parent/Sub' into ('gdrive:', 'Parent', 'Sub')."""
+    remote, _, path = remote_path.partition(":")
+    parent, _, sub = path.rstrip("/").rpartition("/")
+    return remote + ":", parent, sub
+
+def join_remote_path(remote, parent, sub):
+    """Inverse of split_remote_path(); an empty parent means a folder at the Drive root."""
+    return f"{remote}{parent + '/' if parent else ''}{sub}"
+
+def remote_exists(remote_path):
+    """True if remote_path exists on the remote (file or directory)."""
+    result = run_rclone("lsjson", "--stat", remote_path, capture_output=True)
+    return result.returncode == 0
+
+def remote_is_empty(remote_path):
+    """True if the remote directory has no entries at all."""
+    result = run_rclone("lsf", "--max-depth", "1", remote_path,
+                        capture_output=True, text=True)
+    return result.returncode == 0 and not result.stdout.strip()
+
+def migrate_remote(src, dst):
+    """
+    Move the remote tree src to dst with rclone's server-side directory move
+    (a single parent change on Drive – nothing is downloaded or re-uploaded).
+    dst must not exist, or be an empty folder which is removed first.
+    Returns True on success.
+    """
+    if src.rstrip("/") == dst.rstrip("/"):
+        return True
+    if not remote_exists(src):
+        print_error(f"Remote folder not found: {src}")
+        return False
+    if remote_exists(dst):
+        if not remote_is_empty(dst):
+            print_error(f"Destination already contains files: {dst}")
+            return False
+        # Setup may already have created the (empty) target – a directory move needs it gone
+        run_rclone("rmdir", dst, capture_output=True)
+    remote, parent, _ = split_remote_path(dst)
+    if parent:
+        run_rclone("mkdir", f"{remote}{parent}", capture_output=True)
+
+    print_info(f" Moving {c(src, 'cyan')} → {c(dst, 'cyan')} (server-side)...")
+    result = run_rclone("move", src, dst, "--delete-empty-src-dirs",
+                        capture_output=True, text=True)
+    if result.returncode != 0:
+        print_error(f"Move failed: {result.stderr.strip()}")
+        log_event("MIGRATE_FAILED", f"Move failed: {src} → {dst}", details={"stderr": result.stderr.strip()})
+        return False
+    run_rclone("rmdir", src, capture_output=True)
+    log_event("MIGRATED", f"Moved remote folder: {src} → {dst}")
+    return True
+
+def retarget_job(local_name, job, new_remote_path):
+    """Point a job (plus its seed progress and remote cache) at a new remote path and save it."""
+    job["remote_path"] = new_remote_path
+    save_job(local_name, job)
+    state = load_seed_state(local_name)
+    if state:
+        state["remote_path"] = new_remote_path
+        save_seed_state(local_name, state)
+    # The tree moved intact (same IDs), so the cached listing stays valid
+    cache = load_remote_cache(local_name)
+    if cache:
+        cache["remote_path"] = new_remote_path
+        save_remote_cache(local_name, cache)
+
+def migrate_job(local_name, new_parent=None, new_sub=None):
+    """Move one job's remote tree to a new parent and/or subfolder. Returns an exit code."""
+    job = load_job(local_name)
+    if not job:
+        print_error(f"No job named '{local_name}' in settings.json")
+        return 2
+    remote, parent, sub = split_remote_path(job["remote_path"])
+    new_remote_path = join_remote_path(remote, new_parent or parent, new_sub or sub)
+    if not migrate_remote(job["remote_path"], new_remote_path):
+        return 1
+    retarget_job(local_name, job, new_remote_path)
+    print_success(f"Job '{local_name}' now backs up to {new_remote_path}")
+    return 0
+
+def migrate_parent(new_parent):
+    """Rename the saved parent folder on Drive and re-point every job inside it."""
+    old_parent = load_parent_folder()
+    if not old_parent:
+        print_error("No parent folder saved in settings.json")
+        return 2
+    if not migrate_remote(f"gdrive:{old_parent}", f"gdrive:{new_parent}"):
+        return 1
+    save_settings(parent_folder=new_parent)
+    old_prefix = f"gdrive:{old_parent}/"
+    for local_name, job in load_settings().get("jobs", {}).items():
+        if job.get("remote_path", "").startswith(old_prefix):
+            retarget_job(local_name, job, f"gdrive:{new_parent}/" + job["remote_path"][len(old_prefix):])
+    print_success(f"Parent folder moved: {old_parent} → {new_parent}")
+    return 0
+
+# ---------- HEADLESS PROVISIONING (fleet rollout, no prompts) ----------
+# Job spec keys copied into the saved job definition when present
+JOB_SPEC_KEYS = ("filters", "tuning", "interval_minutes", "seed", "remote_cache", "remote_rescan_hours", "delta", "versions",
+                 "profile", "memory_ceiling_mb")
+NUMBER = (int, float)
+JOB_SPEC_TYPES = {
+    "local_path": str, "name": str, "remote": str, "create": bool,
+    "filters": dict, "tuning": dict, "seed": dict, "delta": dict, "versions": dict,
+    "remote_cache": bool, "profile": str,
+    "interval_minutes": NUMBER, "remote_rescan_hours": NUMBER, "memory_ceiling_mb": NUMBER,
+}
+# The job name becomes part of file, shortcut and script names
+INVALID_JOB_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]|^\.*$|^(con|prn|aux|nul|com\d|lpt\d)(\..*)?$', re.IGNORECASE)
+
+def validate_job_spec(spec, name):
+    """Return an error message for a malformed job spec, or None if it is usable."""
+    if not isinstance(spec, dict):
+        return "job spec must be a JSON object"
+    for key, expected in JOB_SPEC_TYPES.items():
+        value = spec.get(key)
+        # bool is an int subclass – reject it where a number is expected
+        if value is not None and (not isinstance(value, expected) or
+                                  (expected is NUMBER and isinstance(value, bool))):
+            return f"'{key}' has the wrong type ({type(value).__name__})"
+    if not spec.get("local_path"):
+        return "local_path is required"
+    if not name or INVALID_JOB_NAME.search(name) or name != name.strip():
+        return f"invalid job name '{name}'"
+    for key in ("interval_minutes", "remote_rescan_hours", "memory_ceiling_mb"):
+        if key in spec and spec[key] <= 0:
+            return f"'{key}' must be positive"
+    if spec.get("profile") and spec["profile"] not in JOB_PROFILES:
+        return f"unknown profile '{spec['profile']}'"
+    try:
+        compile_filters(spec.get("filters"))
+        for key in ("delta", "versions"):
+            if key in spec:
+                parse_size((spec[key] or {}).get("min_size"))
+                parse_size((spec[key] or {}).get("chunk_size"))
+    except (ValueError, TypeError, AttributeError, re.error) as e:
+        return f"invalid filters or sizes: {e}"
+    return None
+
+def resolve_remote_path(remote, parent_folder, name):
+    """
+    Turn a job spec's remote into a full rclone path:
+    None → gdrive:{parent}/{name}, "Sub" → gdrive:{parent}/Sub,
+    "Parent/Sub" → gdrive:Parent/Sub, "gdrive:..." stays as is.
+    """
+    if not remote:
+        return f"gdrive:{parent_folder}/{name}"
+    if re.match(r"^[\w\- ]{2,}:", remote):
+        return remote
+    if "/" in remote:
+        return f"gdrive:{remote.strip('/')}"
+    return f"gdrive:{parent_folder}/{remote}"
+
+def load_job_specs(config_file=None, job_args=None, parent_folder=None):
+    """
+    Collect job specs from a JSON file and/or repeated --job "LOCAL=REMOTE" arguments.
+    The file looks like {"parent_folder": ..., "defaults": {...}, "jobs": [{...}, ...]}.
+    Returns (parent_folder, specs) with the file's defaults merged into each spec.
+    """
+    config = {}
+    if config_file:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    specs = list(config.get("jobs", []))
+    for arg in job_args or []:
+        local, _, remote = arg.partition("=")
+        spec = {"local_path": local.strip()}
+        if remote.strip():
+            spec["remote"] = remote.strip()
+        specs.append(spec)
+    defaults = config.get("defaults", {})
+    specs = [{**defaults, **spec} if isinstance(spec, dict) else spec for spec in specs]
+    parent_folder = parent_folder or config.get("parent_folder") or load_parent_folder() or "ZEN BACKUP"
+    return parent_folder, specs
+
+def provision_jobs(parent_folder, specs, create_missing=False):
+    """
+    Provision every job spec in one pass: one auth/connection check, shared
+    parent folders created once, job folders created concurrently, one settings
+    write, one PowerShell session.
+    Returns (result dict, exit code) – 0 all ok, 1 some jobs failed, 2 fatal.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    result = {"ok": False, "parent_folder": parent_folder, "jobs": [], "error": None}
+    log_event("PROVISION_START", f"Headless provisioning of {len(specs)} job(s)")
+
+    if not extract_rclone():
+        result["error"] = "rclone is not available"
+        return result, 2
+    # is_config_valid() lists the remote, so it doubles as the connection check
+    if not is_config_valid() and not (copy_source_config_if_valid() and is_config_valid()):
+        result["error"] = "Google Drive authentication missing or invalid – run the interactive setup once"
+        return result, 2
+    if load_parent_folder() is None:
+        save_settings(parent_folder=parent_folder)
+
+    entries = []
+    for spec in specs:
+        if not isinstance(spec, dict):
+            entries.append(({"name": None, "local_path": None, "remote_path": None, "ok": False,
+                             "error": "job spec must be a JSON object"}, {}))
+            continue
+        # Sync runs from the install folder, so a relative or ~ path must be pinned now
+        local_path = (Path(spec["local_path"]).expanduser().resolve()
+                      if isinstance(spec.get("local_path"), str) and spec["local_path"].strip() else Path(""))
+        name = spec.get("name") or local_path.name
+        error = validate_job_spec(spec, name)
+        entry = {"name": name, "local_path": str(local_path),
+                 "remote_path": None if error else resolve_remote_path(spec.get("remote"), parent_folder, name),
+                 "ok": False, "error": error}
+        if error:
+            entries.append((entry, spec))
+            continue
+        if any(e["name"] == name for e, _ in entries):
+            entry["error"] = f"duplicate job name '{name}'"
+        elif not local_path.is_dir():
+            if create_missing or spec.get("create"):
+                try:
+                    local_path.mkdir(parents=True, exist_ok=True)
+                except OSError as e:
+                    entry["error"] = f"could not create local folder: {e}"
+            else:
+                entry["error"] = "local folder not found"
+        entries.append((entry, spec))
+    ready = [(entry, spec) for entry, spec in entries if not entry["error"]]
+
+    # Remote folders. Drive allows duplicate names, so two concurrent mkdirs of
+    # the same missing parent create two "Parent" folders. Each distinct parent
+    # is created once, serially and shallowest first; the leaves then go in parallel.
+    def make_remote(path):
+        return run_rclone("mkdir", path, capture_output=True, text=True)
+    parent_errors = {}
+    parents = set()
+    for entry, _ in ready:
+        remote, parent, _sub = split_remote_path(entry["remote_path"])
+        parts = parent.split("/") if parent else []
+        parents.update(join_remote_path(remote, "/".join(parts[:depth - 1]), parts[depth - 1])
+                       for depth in range(1, len(parts) + 1))
+    for path in sorted(parents, key=lambda p: p.count("/")):
+        if any(path.startswith(failed + "/") for failed in parent_errors):
+            continue
+        proc = make_remote(path)
+        if proc.returncode != 0:
+            parent_errors[path] = proc.stderr.strip()
+    leaves = []
+    for entry, _ in ready:
+        failed = next((p for p in parent_errors if entry["remote_path"].startswith(p + "/")), None)
+        if failed:
+            entry["error"] = f"could not create remote folder {failed}: {parent_errors[failed]}"
+        elif entry["remote_path"] not in leaves:
+            leaves.append(entry["remote_path"])
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(leaves)))) as pool:
+        leaf_results = dict(zip(leaves, pool.map(make_remote, leaves)))
+    for entry, _ in ready:
+        proc = leaf_results.get(entry["remote_path"])
+        if not entry["error"] and proc.returncode != 0:
+            entry["error"] = f"could not create remote folder: {proc.stderr.strip()}"
+    ready = [(entry, spec) for entry, spec in ready if not entry["error"]]
+
+    # All job definitions in a single settings.json write
+    settings = load_settings()
+    jobs = settings.setdefault("jobs", {})
+    for entry, spec in ready:
+        job = jobs.get(entry["name"]) or new_job(entry["local_path"], entry["remote_path"])
+        job["local_path"], job["remote_path"] = entry["local_path"], entry["remote_path"]
+        for key in JOB_SPEC_KEYS:
+            if key in spec:
+                job[key] = spec[key]
+        jobs[entry["name"]] = job
+    write_settings(settings)
+
+    runner_python = install_runner()
+    actions, script_files, loops = [], [], {}
+    for entry, _ in ready:
+        job = jobs[entry["name"]]
+        bat, vbs = write_job_scripts(entry["name"], runner_python,
+                                     job.get("interval_minutes", DEFAULT_INTERVAL_MINUTES))
+        script_files += [bat, vbs]
+        loops[entry["name"]] = vbs
+        shortcut_path = startup_shortcut_path(entry["name"])
+        if shortcut_path.exists():
+            shortcut_path.unlink()
+        actions.append(startup_shortcut_action(shortcut_path, vbs, entry["name"]))
+    exclusion_actions = defender_firewall_actions(script_files) if ready else []
+    ps_results = run_powershell_batch(actions + exclusion_actions)
+    result["exclusions"] = {a["name"]: ps_results[a["name"]]["ok"] for a in exclusion_actions}
+
+    for entry, _ in ready:
+        shortcut = ps_results[f"shortcut:{entry['name']}"]
+        if not shortcut["ok"]:
+            entry["error"] = f"startup shortcut failed: {shortcut['error']}"
+            continue
+        subprocess.Popen(["wscript.exe", str(loops[entry["name"]])], shell=True)
+        entry["ok"] = True
+
+    result["jobs"] = [entry for entry, _ in entries]
+    result["ok"] = bool(entries) and all(entry["ok"] for entry in result["jobs"])
+    log_event("PROVISION_END", f"Provisioned {sum(e['ok'] for e in result['jobs'])}/{len(entries)} job(s)",
+              details=result)
+    return result, (0 if result["ok"] else 1)
+
+def run_provision(config_file=None, job_args=None, parent_folder=None, create_missing=False, output=None):
+    """CLI entry: human output goes to stderr, the JSON result to stdout (and optionally a file)."""
+    import contextlib
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            parent_folder, specs = load_job_specs(config_file, job_args, parent_folder)
+            if not specs:
+                result, code = {"ok": False, "jobs": [], "error": "no jobs given"}, 2
+            else:
+                result, code = provision_jobs(parent_folder, specs, create_missing)
+        except Exception as e:
+            result, code = {"ok": False, "jobs": [], "error": str(e)}, 2
+    payload = json.dumps(result, indent=2, ensure_ascii=False)
+    print(payload)
+    if output:
+        Path(output).write_text(payload, encoding='utf-8')
+    return code
+
 def log_sync_result(proc, local_path, remote_path):
     if proc.returncode == 0:
         log_event("SYNC_SUCCESS", f"Sync completed: {local_path} → {remote_path}")
@@ -872,6 +2910,34 @@ def main():
     
     log_event("LOCAL_FOLDER", f"Local folder ready: {local_path}")
 
+    # ---------- EXISTING BACKUP ELSEWHERE? MOVE IT INSTEAD OF RE-UPLOADING ----------
+    existing = load_job(local_name)
+    if existing and existing.get("remote_path") != remote_path \
+            and Path(existing.get("local_path", "")) == Path(local_path):
+        print_info(f" This folder is already backed up to {c(existing['remote_path'], 'cyan')}.")
+        answer = input(c(f"   🚚 Move that backup to {remote_path} instead of re-uploading? [Y/n]: ",
+                         "cyan")).strip().lower()
+        if answer in ("", "y", "yes"):
+            if migrate_remote(existing["remote_path"], remote_path):
+                retarget_job(local_name, existing, remote_path)
+                print_success("Existing backup moved – no re-upload needed.")
+            else:
+                print_warning("Move failed – the next sync will upload to the new folder.")
+
+    # ---------- JOB DEFINITION (filters live in settings.json) ----------
+    job = load_job(local_name) or new_job(local_path, remote_path)
+    job["local_path"] = str(local_path)
+    job["remote_path"] = remote_path
+    job.setdefault("filters", copy.deepcopy(DEFAULT_FILTERS))
+    save_job(local_name, job)
+    filters = job["filters"]
+    print_info(f" Exclusion filters: {'built-in defaults' if filters.get('use_defaults', True) else 'no defaults'}"
+               f" + {len(filters.get('exclude', []))} custom (edit 'jobs' in settings.json)")
+
+    # ---------- PRE-FLIGHT SCAN ----------
+    job = run_preflight(local_name, job)
+    save_job(local_name, job)
+
     # ---------- PERMANENT INSTALLATION (all files go directly to system folder) ----------
     if install_to_system(local_name, remote_path, local_path):
         print_step(8, "Background sync scheduled")
@@ -894,6 +2960,9 @@ def main():
     print(f"      • Shortcut:           {c(SHORTCUT_NAME.format(local_name), 'cyan')}")
     print(f"      • Process:            {c('wscript.exe', 'cyan')} in Task Manager")
     print(f"      • Log file:           {c(LOG_FILE, 'cyan')}")
+    print(f"      • Filters:            {c(SETTINGS_FILE, 'cyan')} → jobs → {c(local_name, 'cyan')} → filters")
+    if (load_job(local_name) or {}).get("seed", {}).get("enabled"):
+        print(f"      • Seed progress:      {c(f'ADF_CLI.py seed-status {local_name}', 'cyan')}")
     print("\n   " + c("📌 PERMANENT LOCATION:", 'yellow', bold=True))
     print(f"      • System folder:      {c(INSTALL_DIR, 'cyan')} (hidden)")
     print(f"      • Status:             {c('Running from system location', 'green', bold=True)}")
@@ -915,5 +2984,61 @@ def main():
     log_event("SESSION_END", "Setup completed successfully")
     input(c("\n🎉  Press Enter to exit...", "cyan"))
 
+# ---------- COMMAND LINE ----------
+def cli(argv=None):
+    """Dispatch sub-commands; with no arguments run the interactive setup."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="ADF_CLI", description="Auto Drive Fetch")
+    sub = parser.add_subparsers(dest="command")
+    p_sync = sub.add_parser("sync", help="Run one backup cycle for a job (used by sync_xxx.bat)")
+    p_sync.add_argument("job")
+    p_seed = sub.add_parser("seed-status", help="Show first-sync seeding progress for a job")
+    p_seed.add_argument("job")
+    p_migrate = sub.add_parser("migrate", help="Move a job's (or the parent folder's) Drive backup server-side")
+    p_migrate.add_argument("job", nargs="?", help="Job to move; omit to move the whole parent folder")
+    p_migrate.add_argument("--parent", help="New parent folder name")
+    p_migrate.add_argument("--sub", help="New subfolder name (requires a job)")
+    p_restore = sub.add_parser("restore", help="Reassemble a chunk-stored (delta) file from Drive")
+    p_restore.add_argument("job")
+    p_restore.add_argument("path", help="File path relative to the backed-up folder")
+    p_restore.add_argument("--to", help="Destination file (default: current folder)")
+    p_versions = sub.add_parser("list-versions", help="List archived file versions of a job (local index)")
+    p_versions.add_argument("job")
+    p_versions.add_argument("path", nargs="?", help="Only this file or folder (relative to the backup)")
+    p_versions.add_argument("--prune", action="store_true", help="Apply the retention policy now")
+    p_prov = sub.add_parser("provision", help="Non-interactive setup of one or more jobs (prints JSON)")
+    p_prov.add_argument("--config", help="JSON file with parent_folder, defaults and jobs")
+    p_prov.add_argument("--job", action="append", metavar="LOCAL[=REMOTE]",
+                        help="Local folder and optional remote (Sub, Parent/Sub or gdrive:...); repeatable")
+    p_prov.add_argument("--parent", help="Parent folder in Google Drive")
+    p_prov.add_argument("--create-missing", action="store_true", help="Create local folders that do not exist")
+    p_prov.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "sync":
+        return run_sync_job(args.job)
+    if args.command == "seed-status":
+        return print_seed_status(args.job)
+    if args.command == "restore":
+        return restore_delta_file(args.job, args.path, args.to)
+    if args.command == "list-versions":
+        if args.prune:
+            job = load_job(args.job)
+            if not job:
+                print_error(f"No job named '{args.job}' in settings.json")
+                return 2
+            prune_versions(args.job, job, force=True)
+        return list_versions(args.job, args.path)
+    if args.command == "provision":
+        return run_provision(args.config, args.job, args.parent, args.create_missing, args.output)
+    if args.command == "migrate":
+        if args.job:
+            return migrate_job(args.job, new_parent=args.parent, new_sub=args.sub)
+        if args.parent and not args.sub:
+            return migrate_parent(args.parent)
+        parser.error("migrate needs a job, or --parent on its own to move the whole parent folder")
+    main()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file
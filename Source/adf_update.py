@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Auto Drive Fetch – Update Manager (called by ADF_CLI.cmd before launch)
+- Reads the local version straight from ADF_CLI.py – never imports it
+- Caches the remote version in %LOCALAPPDATA%\.systembackup\update_cache.json
+  (TTL + ETag / If-None-Match), so warm launches skip the network entirely
+- Queries all version sources concurrently under one overall deadline
+- Downloads the new script, verifies it (version, syntax and the sha256 published
+  in Source/SHA256SUMS) and swaps it in atomically – a failed update never leaves
+  a broken script
+Exit codes: 0 = up to date or updated, 3 = update failed (existing script kept);
+anything else means the updater itself broke and the .cmd falls back to its own check.
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import hashlib
+import tempfile
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+# ---------- CONFIGURATION ----------
+SCRIPT_DIR = Path(__file__).parent.resolve()
+MANAGED_SCRIPT = SCRIPT_DIR / "ADF_CLI.py"
+UPDATER_SCRIPT = Path(__file__).resolve()
+
+REPO_BASES = [
+    "https://raw.githubusercontent.com/maiz-an/AutoDriveFetch/main",
+    "https://cdn.jsdelivr.net/gh/maiz-an/AutoDriveFetch@main",
+]
+VERSION_PATH = "version.txt"
+SCRIPT_PATH = "Source/ADF_CLI.py"
+UPDATER_PATH = "Source/adf_update.py"
+# sha256sum-format manifest, regenerated on every release:
+#   sha256sum Source/ADF_CLI.py Source/adf_update.py > Source/SHA256SUMS
+MANIFEST_PATH = "Source/SHA256SUMS"
+
+CACHE_TTL_SECONDS = 6 * 3600
+DEADLINE_SECONDS = 8
+DOWNLOAD_TIMEOUT = 30
+MIN_SCRIPT_BYTES = 1000
+
+def get_cache_path():
+    """update_cache.json lives next to the installed system files (temp dir as fallback)."""
+    base = os.environ.get("LOCALAPPDATA")
+    folder = Path(base) / ".systembackup" if base else Path(tempfile.gettempdir())
+    return folder / "update_cache.json"
+
+CACHE_FILE = get_cache_path()
+
+def log(msg):
+    print(f"[UPDATE] {msg}", flush=True)
+
+# ---------- VERSIONS ----------
+VERSION_RE = re.compile(r"""^__version__\s*=\s*["']([^"']+)["']""", re.MULTILINE)
+
+def read_version(text):
+    """Return the __version__ string found in script text, or None."""
+    match = VERSION_RE.search(text)
+    return match.group(1) if match else None
+
+def read_local_version(path=MANAGED_SCRIPT):
+    """Read __version__ from the script file without importing it."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return read_version(f.read(64 * 1024))
+    except OSError:
+        return None
+
+def version_tuple(version):
+    """'2.0.11' → (2, 0, 11); anything unparsable sorts lowest."""
+    try:
+        return tuple(int(part) for part in version.strip().split("."))
+    except (AttributeError, ValueError):
+        return (0,)
+
+# ---------- CACHE ----------
+def load_cache():
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError:
+        pass
+
+# ---------- NETWORK ----------
+def http_get(url, timeout, etag=None):
+    """
+    GET url. Returns (status, body bytes or None, etag).
+    A 304 Not Modified comes back as (304, None, etag).
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": "AutoDriveFetch-Updater"})
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        return e.code, None, etag
+
+def fetch_remote_version(cache, deadline):
+    """
+    Ask every version source at once and wait at most `deadline` seconds in total.
+    Returns the highest version any source reported (a 304 reuses the cached
+    value), or None if nothing answered in time.
+    """
+    etags = cache.get("etags", {})
+    urls = [f"{base}/{VERSION_PATH}" for base in REPO_BASES]
+    # Daemon threads: a source still hanging at the deadline must not keep the
+    # interpreter alive (pool workers are joined at exit, up to their own timeout)
+    results = {}
+    def ask(url):
+        try:
+            results[url] = http_get(url, deadline, etags.get(url))
+        except Exception as e:
+            results[url] = e
+    threads = [threading.Thread(target=ask, args=(url,), daemon=True) for url in urls]
+    for thread in threads:
+        thread.start()
+    end = time.monotonic() + deadline
+    for thread in threads:
+        thread.join(max(0.0, end - time.monotonic()))
+
+    versions = []
+    for url, outcome in list(results.items()):
+        if isinstance(outcome, Exception):
+            log(f"{url}: {outcome}")
+            continue
+        status, body, etag = outcome
+        if status == 304 and cache.get("versions", {}).get(url):
+            versions.append(cache["versions"][url])
+        elif status == 200 and body and body.strip():
+            version = body.decode('utf-8', errors='replace').strip().splitlines()[0].strip()
+            cache.setdefault("versions", {})[url] = version
+            if etag:
+                etags[url] = etag
+            versions.append(version)
+    cache["etags"] = etags
+    return max(versions, key=version_tuple) if versions else None
+
+def get_remote_version(cache, ttl, deadline, force=False):
+    """Remote version from the cache while it is fresh, otherwise from the network."""
+    fresh = time.time() - cache.get("checked_at", 0) < ttl
+    if fresh and not force and cache.get("remote_version"):
+        log(f"Remote version {cache['remote_version']} (cached)")
+        return cache["remote_version"]
+    version = fetch_remote_version(cache, deadline)
+    if version:
+        cache["remote_version"] = version
+        cache["checked_at"] = time.time()
+        log(f"Remote version {version}")
+    else:
+        version = cache.get("remote_version")
+        log(f"No version source answered within {deadline}s"
+            + (f" – using last known {version}" if version else ""))
+    save_cache(cache)
+    return version
+
+# ---------- VERIFIED, ATOMIC REPLACE ----------
+def parse_manifest(text):
+    """Parse sha256sum output ("<hex>  <path>" or "<hex> *<path>") into {path: hex}."""
+    digests = {}
+    for line in text.splitlines():
+        match = re.fullmatch(r"\s*([0-9a-fA-F]{64})\s+\*?(\S.*?)\s*", line)
+        if match:
+            digests[match.group(2).replace("\\", "/")] = match.group(1).lower()
+    return digests
+
+def fetch_manifest(base):
+    """The published digests from one source ({} if it has none)."""
+    status, body, _ = http_get(f"{base}/{MANIFEST_PATH}", DOWNLOAD_TIMEOUT)
+    if status != 200 or not body:
+        return {}
+    return parse_manifest(body.decode('utf-8', errors='replace'))
+
+def verify_script(body, url, expected_version, expected_digest):
+    """
+    Check a downloaded script before it may replace the current one.
+    A missing or mismatched published digest fails the check.
+    Returns the sha256 hex digest, or raises ValueError.
+    """
+    if not expected_digest:
+        raise ValueError("no published sha256")
+    if len(body) < MIN_SCRIPT_BYTES:
+        raise ValueError(f"download too small ({len(body)} bytes)")
+    digest = hashlib.sha256(body).hexdigest()
+    if digest != expected_digest:
+        raise ValueError(f"sha256 mismatch (got {digest[:12]}…, published {expected_digest[:12]}…)")
+    text = body.decode('utf-8')
+    if expected_version and read_version(text) != expected_version:
+        raise ValueError(f"expected version {expected_version}, got {read_version(text)}")
+    compile(text, url, "exec")
+    return digest
+
+def atomic_write(target, body):
+    """Write body to a temp file beside target, fsync it, then os.replace it in."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), prefix=target.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        # Antivirus scanners may hold the old file for a moment
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, target)
+                return
+            except PermissionError:
+                if attempt == 4:
+                    raise
+                time.sleep(0.5)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def download_verified(path, target, expected_version=None):
+    """
+    Fetch path from the first source that yields a valid script and install it.
+    The digest comes from the same source's manifest, so a mirror that lags
+    behind fails cleanly instead of mixing releases. Returns sha256 or None.
+    """
+    for base in REPO_BASES:
+        url = f"{base}/{path}"
+        try:
+            expected_digest = fetch_manifest(base).get(path)
+            status, body, _ = http_get(url, DOWNLOAD_TIMEOUT)
+            if status != 200 or not body:
+                log(f"{url}: HTTP {status}")
+                continue
+            digest = verify_script(body, url, expected_version, expected_digest)
+            atomic_write(target, body)
+            log(f"Installed {target.name} from {url} (sha256 {digest[:12]}…)")
+            return digest
+        except Exception as e:
+            log(f"{url}: {e}")
+    return None
+
+# ---------- MAIN ----------
+EXIT_UPDATE_FAILED = 3
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Auto Drive Fetch update manager")
+    parser.add_argument("--force", action="store_true", help="ignore the cached remote version")
+    parser.add_argument("--ttl", type=int, default=CACHE_TTL_SECONDS, help="version cache lifetime (s)")
+    parser.add_argument("--deadline", type=float, default=DEADLINE_SECONDS, help="overall check deadline (s)")
+    args = parser.parse_args(argv)
+
+    cache = load_cache()
+    local_version = read_local_version()
+    if local_version is None:
+        log("ADF_CLI.py missing or unreadable – downloading latest...")
+        remote_version = get_remote_version(cache, args.ttl, args.deadline, force=True)
+        if not download_verified(SCRIPT_PATH, MANAGED_SCRIPT, remote_version):
+            return EXIT_UPDATE_FAILED
+        return 0
+
+    log(f"Local version {local_version}")
+    remote_version = get_remote_version(cache, args.ttl, args.deadline, force=args.force)
+    if not remote_version or version_tuple(remote_version) <= version_tuple(local_version):
+        log("Up to date.")
+        return 0
+
+    log(f"Updating {local_version} → {remote_version}...")
+    if not download_verified(SCRIPT_PATH, MANAGED_SCRIPT, remote_version):
+        log("Update failed – keeping the current script.")
+        return EXIT_UPDATE_FAILED
+    # Keep the updater itself current too (best effort)
+    download_verified(UPDATER_PATH, UPDATER_SCRIPT)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
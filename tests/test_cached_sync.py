@@ -0,0 +1,184 @@
+"""
+Cached sync against a fake rclone: the "remote" is a plain local folder and
+run_rclone is replaced by a small stand-in that implements the handful of
+commands run_cached_sync uses (lsjson, copy, delete, rmdirs).
+
+Run with:  python -m unittest discover tests
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_SANDBOX = tempfile.mkdtemp(prefix="adf_test_")
+os.environ["LOCALAPPDATA"] = _SANDBOX
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Source"))
+
+import ADF_CLI  # noqa: E402
+
+
+class FakeRclone:
+    """Records every call and applies it to a local directory tree."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args, capture_output=False, timeout=None, **kwargs):
+        args = [str(a) for a in args]
+        self.calls.append(args)
+        text = kwargs.get("text") or kwargs.get("encoding")
+        stdout, returncode = "", 0
+        op = args[0]
+        if op == "lsjson":
+            stdout = json.dumps(self._lsjson(args))
+        elif op == "copy":
+            src, dst = args[1], args[2]
+            for rel in self._list(args):
+                target = Path(dst, rel)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(Path(src, rel), target)
+        elif op == "delete":
+            for rel in self._list(args):
+                Path(args[1], rel).unlink()
+        elif op == "rmdirs":
+            for folder, _, _ in sorted(os.walk(args[1]), reverse=True):
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+        else:
+            raise AssertionError(f"unexpected rclone call: {args}")
+        out = stdout if text else stdout.encode()
+        return ADF_CLI.subprocess.CompletedProcess(args, returncode, out, "" if text else b"")
+
+    @staticmethod
+    def _list(args):
+        list_file = args[args.index("--files-from-raw") + 1]
+        return [line for line in Path(list_file).read_text(encoding="utf-8").split("\n") if line]
+
+    def _lsjson(self, args):
+        root = Path(args[-1])
+        if "--files-from-raw" in args:
+            rels = self._list(args)
+        else:
+            rels = [p.relative_to(root).as_posix() for p in root.rglob("*")
+                    if p.is_file() and not p.relative_to(root).as_posix().startswith(ADF_CLI.RESERVED_PREFIX)]
+        items = []
+        for rel in rels:
+            path = root / rel
+            if path.is_file():
+                st = path.stat()
+                items.append({
+                    "Path": rel, "Size": st.st_size, "IsDir": False,
+                    "ModTime": datetime.datetime.fromtimestamp(st.st_mtime, datetime.timezone.utc).isoformat(),
+                    "Hashes": {"md5": hashlib.md5(path.read_bytes()).hexdigest()},
+                })
+        return items
+
+    def ops(self):
+        return [call[0] for call in self.calls]
+
+
+class CachedSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(dir=_SANDBOX))
+        self.local = self.tmp / "local"
+        self.remote = self.tmp / "remote"
+        self.remote.mkdir()
+        self.write("top.txt", "top")
+        self.write("docs/a/report.txt", "report")
+        self.write("docs/b/notes.txt", "notes")
+        self.job = {"local_path": str(self.local), "remote_path": str(self.remote)}
+        self.name = self.tmp.name
+        self.fake = FakeRclone()
+        self._real_rclone = ADF_CLI.run_rclone
+        ADF_CLI.run_rclone = self.fake
+
+    def tearDown(self):
+        ADF_CLI.run_rclone = self._real_rclone
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, rel, body):
+        path = self.local / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(body, encoding="utf-8")
+
+    def remote_files(self):
+        return sorted(p.relative_to(self.remote).as_posix() for p in self.remote.rglob("*") if p.is_file())
+
+    def test_first_run_uploads_everything(self):
+        self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 0)
+        self.assertEqual(self.remote_files(), ["docs/a/report.txt", "docs/b/notes.txt", "top.txt"])
+
+    def test_unchanged_tree_makes_no_rclone_calls(self):
+        ADF_CLI.run_cached_sync(self.name, self.job)
+        self.fake.calls.clear()
+        self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 0)
+        self.assertEqual(self.fake.calls, [])
+
+    def test_changed_file_is_uploaded_alone(self):
+        ADF_CLI.run_cached_sync(self.name, self.job)
+        self.fake.calls.clear()
+        self.write("docs/a/report.txt", "report v2")
+        self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 0)
+        self.assertEqual(self.fake.ops(), ["copy", "lsjson"])
+        self.assertEqual((self.remote / "docs/a/report.txt").read_text(encoding="utf-8"), "report v2")
+
+    def test_deletion_removes_emptied_folders(self):
+        ADF_CLI.run_cached_sync(self.name, self.job)
+        shutil.rmtree(self.local / "docs" / "a")
+        self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 0)
+        self.assertEqual(self.remote_files(), ["docs/b/notes.txt", "top.txt"])
+        self.assertFalse((self.remote / "docs" / "a").exists())
+        self.assertTrue((self.remote / "docs" / "b").exists())
+
+    def test_missing_root_fails_without_touching_remote(self):
+        ADF_CLI.run_cached_sync(self.name, self.job)
+        self.fake.calls.clear()
+        shutil.rmtree(self.local)
+        self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 1)
+        self.assertEqual(self.fake.calls, [])
+        self.assertEqual(len(self.remote_files()), 3)
+
+    def test_scan_error_holds_back_deletions(self):
+        ADF_CLI.run_cached_sync(self.name, self.job)
+        real_scandir = os.scandir
+
+        def failing_scandir(path):
+            if Path(path).name == "a":
+                raise PermissionError(13, "Access is denied", str(path))
+            return real_scandir(path)
+
+        ADF_CLI.os.scandir = failing_scandir
+        try:
+            self.assertEqual(ADF_CLI.run_cached_sync(self.name, self.job), 1)
+        finally:
+            ADF_CLI.os.scandir = real_scandir
+        self.assertNotIn("delete", self.fake.ops())
+        self.assertIn("docs/a/report.txt", self.remote_files())
+
+    def test_diff_ignores_excluded_and_reserved_paths(self):
+        compiled = ADF_CLI.compile_filters({"exclude": ["*.tmp"]})
+        cache = {
+            "kept.txt": {"size": 1, "mtime": 0.0},
+            "scratch.tmp": {"size": 1, "mtime": 0.0},
+            ".adf_index/big.pst.json": {"size": 1, "mtime": 0.0},
+            "gone.txt": {"size": 1, "mtime": 0.0},
+        }
+        to_upload, to_delete = ADF_CLI.diff_against_cache({"kept.txt": (1, 0.5), "new.txt": (2, 0.0)},
+                                                          cache, compiled)
+        self.assertEqual(to_upload, ["new.txt"])
+        self.assertEqual(to_delete, ["gone.txt"])
+
+    def test_emptied_remote_dirs_returns_topmost_only(self):
+        self.assertEqual(ADF_CLI.emptied_remote_dirs(["a/b/c/x.txt", "a/d/y.txt", "e/z.txt", "f.txt"],
+                                                     ["a/keep.txt"]),
+                         ["a/b", "a/d", "e"])
+
+
+if __name__ == "__main__":
+    unittest.main()